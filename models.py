@@ -88,6 +88,11 @@ class Permission(db.Model):
     action = db.Column(db.String(50), nullable=False)  # e.g., 'view', 'create', 'edit', 'delete'
     is_system = db.Column(db.Boolean, default=False)  # System-defined permissions
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # INDEXES FOR PERFORMANCE
+    __table_args__ = (
+        db.Index('ix_perm_resource_action', 'resource', 'action'),
+    )
 
 class RolePermission(db.Model):
     """Many-to-many relationship between roles and permissions"""
@@ -102,8 +107,11 @@ class RolePermission(db.Model):
     role = db.relationship('Role', backref='role_permissions')
     permission = db.relationship('Permission', backref='role_permissions')
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('role_id', 'permission_id'),)
+    # Unique constraint and indexes for permission lookups
+    __table_args__ = (
+        db.UniqueConstraint('role_id', 'permission_id'),
+        db.Index('ix_role_permission_role_granted', 'role_id', 'granted'),
+    )
 
 class UserRole(db.Model):
     """Many-to-many relationship between users and roles"""
@@ -120,8 +128,11 @@ class UserRole(db.Model):
     role = db.relationship('Role', overlaps="roles,users")
     assigned_by_user = db.relationship('User', foreign_keys=[assigned_by])
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('user_id', 'role_id'),)
+    # Unique constraint and indexes for permission lookups
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'role_id'),
+        db.Index('ix_user_role_user_active', 'user_id', 'is_active'),
+    )
 
 class UserPermission(db.Model):
     """Direct user permissions (overrides role permissions)"""
@@ -138,8 +149,11 @@ class UserPermission(db.Model):
     permission = db.relationship('Permission', backref='user_permissions')
     granted_by_user = db.relationship('User', foreign_keys=[granted_by])
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('user_id', 'permission_id'),)
+    # Unique constraint and indexes for permission lookups
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'permission_id'),
+        db.Index('ix_user_permission_user_granted', 'user_id', 'granted'),
+    )
 
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
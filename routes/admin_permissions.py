@@ -5,9 +5,10 @@ Handles permission management using the new relational system
 
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from models import db, Permission, Role, RolePermission, User, UserPermission, UserRole
 from utils.permissions_relational import grant_user_permission, revoke_user_permission, get_user_permissions
-from utils.permission_catalog import PermissionCatalog
+from utils.permission_catalog import PermissionCatalog, PermissionEntry
 from datetime import datetime, timedelta
 from functools import wraps
 import json
@@ -43,13 +44,18 @@ def permission_dashboard():
     # Get recent permissions
     recent_permissions = Permission.query.order_by(Permission.created_at.desc()).limit(10).all()
     
-    # Get roles with permission counts
+    # Get roles with permission counts (one grouped query for all roles)
+    permission_counts = dict(
+        db.session.query(RolePermission.role_id, db.func.count(RolePermission.id))
+        .filter(RolePermission.granted == True)
+        .group_by(RolePermission.role_id)
+        .all()
+    )
     roles_with_counts = []
     for role in Role.query.all():
-        permission_count = RolePermission.query.filter_by(role_id=role.id, granted=True).count()
         roles_with_counts.append({
             'role': role,
-            'permission_count': permission_count
+            'permission_count': permission_counts.get(role.id, 0)
         })
     
     return render_template('admin/permission_dashboard.html',
@@ -104,8 +110,10 @@ def add_permission():
                 return jsonify({'success': False, 'message': f'Group {group_name} is full'})
             
             # Check if permission already exists
-            existing_permission = Permission.query.filter_by(name=f"{resource}.{action}").first()
-            if existing_permission:
+            permission_exists = db.session.query(
+                Permission.query.filter_by(name=f"{resource}.{action}").exists()
+            ).scalar()
+            if permission_exists:
                 return jsonify({'success': False, 'message': 'Permission already exists'})
             
             # Create new permission
@@ -203,13 +211,15 @@ def user_permissions(user_id):
     user = User.query.get_or_404(user_id)
     
     # Get user's roles and permissions
-    user_roles = UserRole.query.filter_by(user_id=user_id, is_active=True).all()
+    user_roles = UserRole.query.options(joinedload(UserRole.role)).filter_by(user_id=user_id, is_active=True).all()
     
     # Get all user permissions (from roles and direct)
     all_permissions = get_user_permissions(user)
     
     # Get direct user permissions
-    direct_permissions = UserPermission.query.filter_by(user_id=user_id).all()
+    direct_permissions = UserPermission.query.options(
+        joinedload(UserPermission.permission)
+    ).filter_by(user_id=user_id).all()
     
     # Get all available permissions for assignment
     all_available_permissions = Permission.query.order_by(Permission.resource, Permission.action).all()
@@ -363,11 +373,11 @@ def bulk_import_permissions():
         for permission_id, permission_data in all_permissions.items():
             try:
                 # Validate permission_data structure
-                if not isinstance(permission_data, dict):
+                if not isinstance(permission_data, PermissionEntry):
                     errors.append(f"Permission {permission_id}: Invalid data structure")
                     continue
                 
-                if 'name' not in permission_data or 'resource' not in permission_data or 'action' not in permission_data:
+                if not (permission_data.name and permission_data.resource and permission_data.action):
                     errors.append(f"Permission {permission_id}: Missing required fields (name, resource, or action)")
                     continue
                 
@@ -383,22 +393,22 @@ def bulk_import_permissions():
                 
                 if not existing_permission:
                     # Also check by name in case ID doesn't match
-                    existing_permission = Permission.query.filter_by(name=permission_data['name']).first()
+                    existing_permission = Permission.query.filter_by(name=permission_data.name).first()
                 
                 if existing_permission:
                     # Update existing permission (don't change ID if it already exists with different ID)
-                    existing_permission.name = permission_data['name']
-                    existing_permission.description = permission_data.get('description', '')
+                    existing_permission.name = permission_data.name
+                    existing_permission.description = permission_data.description
                     existing_permission.category = category
-                    existing_permission.resource = permission_data['resource']
-                    existing_permission.action = permission_data['action']
+                    existing_permission.resource = permission_data.resource
+                    existing_permission.action = permission_data.action
                     existing_permission.is_system = True
                     # Try to flush to catch any errors early
                     try:
                         db.session.flush()
                     except Exception as flush_error:
                         db.session.rollback()
-                        error_msg = f"Permission {permission_id} ({permission_data.get('name', 'unknown')}): Flush error: {str(flush_error)}"
+                        error_msg = f"Permission {permission_id} ({permission_data.name}): Flush error: {str(flush_error)}"
                         errors.append(error_msg)
                         current_app.logger.error(f"Permission {permission_id} flush error: {error_msg}")
                         continue
@@ -407,11 +417,11 @@ def bulk_import_permissions():
                     # Create new permission
                     permission = Permission(
                         id=permission_id,
-                        name=permission_data['name'],
-                        description=permission_data.get('description', ''),
+                        name=permission_data.name,
+                        description=permission_data.description,
                         category=category,
-                        resource=permission_data['resource'],
-                        action=permission_data['action'],
+                        resource=permission_data.resource,
+                        action=permission_data.action,
                         is_system=True,
                         created_at=datetime.utcnow()
                     )
@@ -421,7 +431,7 @@ def bulk_import_permissions():
                         db.session.flush()
                     except Exception as flush_error:
                         db.session.rollback()
-                        error_msg = f"Permission {permission_id} ({permission_data.get('name', 'unknown')}): Flush error: {str(flush_error)}"
+                        error_msg = f"Permission {permission_id} ({permission_data.name}): Flush error: {str(flush_error)}"
                         errors.append(error_msg)
                         current_app.logger.error(f"Permission {permission_id} flush error: {error_msg}")
                         continue
@@ -431,7 +441,7 @@ def bulk_import_permissions():
                 # Catch any other errors (validation, etc.)
                 import traceback
                 error_trace = traceback.format_exc()
-                error_msg = f"Permission {permission_id} ({permission_data.get('name', 'unknown') if isinstance(permission_data, dict) else 'unknown'}): {str(perm_error)}"
+                error_msg = f"Permission {permission_id} ({permission_data.name if isinstance(permission_data, PermissionEntry) else 'unknown'}): {str(perm_error)}"
                 errors.append(error_msg)
                 current_app.logger.error(f"Permission {permission_id} error: {error_trace}")
                 # Ensure session is clean
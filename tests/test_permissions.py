@@ -0,0 +1,44 @@
+"""
+Permission checks in utils.permissions must fail closed on database errors
+"""
+
+import pytest
+from flask import Flask
+
+from models import db, User, Role, Permission, RolePermission, UserRole, UserPermission
+from utils.permissions import has_permission
+
+_TABLES = [model.__table__ for model in (User, Role, Permission, RolePermission, UserRole, UserPermission)]
+
+@pytest.fixture
+def app(tmp_path):
+    """App whose database has one member with a role granting items.view"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'permissions.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=_TABLES)
+        user = User(username='member', email='member@example.com', password_hash='x', first_name='Test', last_name='Member')
+        role = Role(name='Member')
+        items_view = Permission(name='items.view', category='data', resource='items', action='view')
+        db.session.add_all([user, role, items_view])
+        db.session.flush()
+        db.session.add_all([
+            UserRole(user_id=user.id, role_id=role.id),
+            RolePermission(role_id=role.id, permission_id=items_view.id)
+        ])
+        db.session.commit()
+        app.config['TEST_USER_ID'] = user.id
+    return app
+
+def test_granted_permission(app):
+    with app.test_request_context():
+        assert has_permission(db.session.get(User, app.config['TEST_USER_ID']), 'items', 'view')
+
+def test_admin_lookup_error_denies(app):
+    with app.test_request_context():
+        user = db.session.get(User, app.config['TEST_USER_ID'])
+        # The admin-role lookup reads the role table; the permission set query doesn't
+        Role.__table__.drop(db.engine)
+        
+        assert not has_permission(user, 'items', 'view')
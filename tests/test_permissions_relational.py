@@ -0,0 +1,122 @@
+"""
+Relational permission checks must follow grants changed by another worker process
+"""
+
+import multiprocessing
+
+import pytest
+from flask import Flask
+
+from models import db, User, Role, Permission, RolePermission, UserRole, UserPermission
+from utils.permissions_relational import (
+    get_permission_by_name, grant_user_permission, has_permission, revoke_user_permission
+)
+
+_TABLES = [model.__table__ for model in (User, Role, Permission, RolePermission, UserRole, UserPermission)]
+
+def _make_app(database_uri):
+    """Minimal app bound to the test database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    db.init_app(app)
+    return app
+
+def _run_in_other_process(target, *args):
+    """Run target(*args) in a freshly spawned interpreter, like a second gunicorn worker"""
+    process = multiprocessing.get_context('spawn').Process(target=target, args=args)
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0
+
+def _revoke_role_permission(database_uri, role_id, permission_id):
+    app = _make_app(database_uri)
+    with app.app_context():
+        RolePermission.query.filter_by(role_id=role_id, permission_id=permission_id).update({'granted': False})
+        db.session.commit()
+
+def _deactivate_user_role(database_uri, user_id, role_id):
+    app = _make_app(database_uri)
+    with app.app_context():
+        UserRole.query.filter_by(user_id=user_id, role_id=role_id).update({'is_active': False})
+        db.session.commit()
+
+def _rename_permission(database_uri, permission_id, name):
+    app = _make_app(database_uri)
+    with app.app_context():
+        Permission.query.filter_by(id=permission_id).update({'name': name})
+        db.session.commit()
+
+def _revoke_direct_permission(database_uri, user_id, permission_id):
+    app = _make_app(database_uri)
+    with app.app_context():
+        assert revoke_user_permission(user_id, permission_id)
+
+@pytest.fixture
+def database(tmp_path):
+    """Database with one member whose role grants items.view"""
+    database_uri = f"sqlite:///{tmp_path / 'permissions.db'}"
+    app = _make_app(database_uri)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=_TABLES)
+        user = User(username='member', email='member@example.com', password_hash='x', first_name='Test', last_name='Member')
+        role = Role(name='Member')
+        items_view = Permission(name='items.view', category='data', resource='items', action='view')
+        reports_view = Permission(name='reports.view', category='data', resource='reports', action='view')
+        db.session.add_all([user, role, items_view, reports_view])
+        db.session.flush()
+        db.session.add_all([
+            UserRole(user_id=user.id, role_id=role.id),
+            RolePermission(role_id=role.id, permission_id=items_view.id)
+        ])
+        db.session.commit()
+        ids = {'user': user.id, 'role': role.id, 'items_view': items_view.id, 'reports_view': reports_view.id}
+    return app, database_uri, ids
+
+def _allowed(app, user_id, resource, action):
+    """Check a permission the way a fresh request would"""
+    with app.test_request_context():
+        return has_permission(db.session.get(User, user_id), resource, action)
+
+def test_role_permission_revoked_by_other_process(database):
+    app, database_uri, ids = database
+    assert _allowed(app, ids['user'], 'items', 'view')
+    
+    _run_in_other_process(_revoke_role_permission, database_uri, ids['role'], ids['items_view'])
+    
+    assert not _allowed(app, ids['user'], 'items', 'view')
+
+def test_direct_permission_revoked_by_other_process(database):
+    app, database_uri, ids = database
+    with app.app_context():
+        assert grant_user_permission(ids['user'], ids['reports_view'])
+    assert _allowed(app, ids['user'], 'reports', 'view')
+    
+    _run_in_other_process(_revoke_direct_permission, database_uri, ids['user'], ids['reports_view'])
+    
+    assert not _allowed(app, ids['user'], 'reports', 'view')
+
+def test_admin_role_removed_by_other_process(database):
+    app, database_uri, ids = database
+    with app.app_context():
+        admin = Role(name='Admin')
+        db.session.add(admin)
+        db.session.flush()
+        db.session.add(UserRole(user_id=ids['user'], role_id=admin.id))
+        db.session.commit()
+        admin_id = admin.id
+    assert _allowed(app, ids['user'], 'reports', 'delete')
+    
+    _run_in_other_process(_deactivate_user_role, database_uri, ids['user'], admin_id)
+    
+    assert not _allowed(app, ids['user'], 'reports', 'delete')
+
+def test_permission_renamed_by_other_process(database):
+    app, database_uri, ids = database
+    with app.test_request_context():
+        assert get_permission_by_name('items.view').id == ids['items_view']
+    
+    _run_in_other_process(_rename_permission, database_uri, ids['items_view'], 'items.list')
+    
+    with app.test_request_context():
+        assert get_permission_by_name('items.view') is None
+        assert isinstance(get_permission_by_name('items.list'), Permission)
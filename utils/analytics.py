@@ -42,6 +42,37 @@ class AnalyticsService:
             current_app.logger.error(f"Failed to track event: {str(e)}")
             return None
     
+    @staticmethod
+    def track_events_bulk(events):
+        """
+        Track a batch of events with a single commit; each event is a dict of
+        track_event arguments with the request details already filled in
+        """
+        try:
+            db.session.add_all([
+                AnalyticsEvent(
+                    event_type=event['event_type'],
+                    event_name=event['event_name'],
+                    user_id=event.get('user_id'),
+                    session_id=event.get('session_id'),
+                    properties=event.get('properties') or {},
+                    page_url=event.get('page_url'),
+                    referrer=event.get('referrer'),
+                    user_agent=event.get('user_agent'),
+                    ip_address=event.get('ip_address'),
+                    button_id=event.get('button_id'),
+                    item_type_id=event.get('item_type_id'),
+                    chatbot_id=event.get('chatbot_id')
+                )
+                for event in events
+            ])
+            db.session.commit()
+            return len(events)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to track {len(events)} events: {str(e)}")
+            return 0
+    
     @staticmethod
     def track_button_click(button_id, button_name, user_id=None):
         """Track button clicks specifically"""
@@ -3,10 +3,108 @@ Permission checking utilities for the BankU application
 Provides decorators and functions for role-based access control
 """
 
+from collections import defaultdict
 from functools import wraps
-from flask import current_app, request, jsonify, redirect, url_for, flash
+from flask import current_app, request, jsonify, redirect, url_for, flash, g, has_app_context
 from flask_login import current_user
-from models import Role, UserRole, Permission, RolePermission, UserPermission
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Role, UserRole, Permission, RolePermission, UserPermission
+
+# Models whose changes make a cached permission set stale
+_PERMISSION_MODELS = (Permission, RolePermission, UserRole, UserPermission)
+
+# User-friendly permission denied messages
+_ERROR_MESSAGES = {
+    ('deals', 'create'): 'You need permission to create deals. Please contact customer support.',
+    ('deals', 'read'): 'You need permission to view deals. Please contact customer support.',
+    ('deals', 'update'): 'You need permission to update deals. Please contact customer support.',
+    ('deals', 'delete'): 'You need permission to delete deals. Please contact customer support.',
+    ('banks', 'create'): 'You need permission to create banks. Please contact customer support.',
+    ('banks', 'read'): 'You need permission to view banks. Please contact customer support.',
+    ('organizations', 'create'): 'You need permission to create organizations. Please contact customer support.',
+    ('organizations', 'read'): 'You need permission to view organizations. Please contact customer support.',
+    ('organizations', 'update'): 'You need permission to modify organizations. Please contact customer support.',
+    ('organizations', 'delete'): 'You need permission to delete organizations. Please contact customer support.',
+    ('ai_matching', 'access_dashboard'): 'You need permission to access AI Matcher. Please contact customer support.',
+    ('profiles', 'create'): 'You need permission to create profiles. Please contact customer support.',
+    ('profiles', 'read'): 'You need permission to view profiles. Please contact customer support.',
+    ('profiles', 'update'): 'You need permission to modify profiles. Please contact customer support.',
+    ('profiles', 'delete'): 'You need permission to delete profiles. Please contact customer support.',
+    ('items', 'create'): 'You need permission to create items. Please contact customer support.',
+    ('items', 'read'): 'You need permission to view items. Please contact customer support.',
+    ('items', 'update'): 'You need permission to modify items. Please contact customer support.',
+    ('items', 'delete'): 'You need permission to delete items. Please contact customer support.',
+    ('chatbots', 'read'): 'You need permission to use chatbots. Please contact customer support.',
+    ('admin', 'access'): 'You need admin permissions to access this area. Please contact customer support.',
+    ('admin', 'manage_items'): 'You need admin permissions to manage items. Please contact customer support.',
+    ('admin', 'delete_any_item'): 'You need admin permissions to delete any item. Please contact customer support.',
+    ('admin', 'verify_items'): 'You need admin permissions to verify items. Please contact customer support.'
+}
+
+_DEFAULT_DENIED_MSG = 'You need permission to access this feature. Please contact customer support.'
+
+_ADMIN_OR_CONNECTOR = frozenset({'Admin', 'Connector'})
+
+_INTERNAL_ROLES = frozenset({'Admin', 'Connector', 'Collector', 'Verifier', 'Content Manager', 'Data Analyst', 'System Administrator'})
+
+def _user_role_names(user):
+    """Get the names of the user's roles, loading them once per request"""
+    role_names = g.setdefault('_user_role_names', {})
+    names = role_names.get(user.id)
+    if names is None:
+        rows = db.session.query(Role.name).join(UserRole, UserRole.role_id == Role.id).filter(
+            UserRole.user_id == user.id
+        ).all()
+        names = role_names[user.id] = frozenset(name for name, in rows)
+    return names
+
+def _load_user_perm_set(user):
+    """Load every (resource, action) pair granted to a user through roles or direct grants"""
+    role_rows = db.session.query(Permission.resource, Permission.action).join(
+        RolePermission, RolePermission.permission_id == Permission.id
+    ).join(
+        UserRole, UserRole.role_id == RolePermission.role_id
+    ).filter(
+        UserRole.user_id == user.id,
+        RolePermission.granted == True
+    ).all()
+    
+    direct_rows = db.session.query(Permission.resource, Permission.action).join(
+        UserPermission, UserPermission.permission_id == Permission.id
+    ).filter(
+        UserPermission.user_id == user.id,
+        UserPermission.granted == True
+    ).all()
+    
+    return frozenset((resource, action) for resource, action in role_rows + direct_rows)
+
+def _get_perm_set(user):
+    """Get the user's permission set, loading it once per request"""
+    perm_sets = g.setdefault('_perm_sets', {})
+    perm_set = perm_sets.get(user.id)
+    if perm_set is None:
+        perm_set = perm_sets[user.id] = _load_user_perm_set(user)
+    return perm_set
+
+def invalidate_permission_cache(user_id=None):
+    """Drop cached permission sets and role names for one user (or everyone) in the current request"""
+    if not has_app_context():
+        return
+    for cache in (g.get('_perm_sets'), g.get('_user_role_names')):
+        if cache:
+            if user_id is None:
+                cache.clear()
+            else:
+                cache.pop(user_id, None)
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_permission_change(session, flush_context):
+    """Invalidate cached permission sets when role or permission rows change"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _PERMISSION_MODELS):
+            invalidate_permission_cache()
+            return
 
 def has_permission(user, resource, action):
     """
@@ -25,46 +123,11 @@ def has_permission(user, resource, action):
             return False
         
         # Super admin bypass (if user has Admin role)
-        try:
-            admin_role = next((role.name for role in user.roles if role.name == 'Admin'), None)
-            if admin_role:
-                return True
-        except Exception as e:
-            current_app.logger.warning(f"Error checking admin role: {e}")
-        
-        # Check user's roles for the required permission using relational system
-        try:
-            # Find the permission in the database
-            permission = Permission.query.filter_by(resource=resource, action=action).first()
-            if not permission:
-                return False
-            
-            # Check if user has this permission through any of their roles
-            for user_role in user.roles:
-                role = user_role.role if hasattr(user_role, 'role') else user_role
-                # Check if role has this permission
-                role_permission = RolePermission.query.filter_by(
-                    role_id=role.id, 
-                    permission_id=permission.id, 
-                    granted=True
-                ).first()
-                if role_permission:
-                    return True
-            
-            # Check if user has direct permission override
-            user_permission = UserPermission.query.filter_by(
-                user_id=user.id, 
-                permission_id=permission.id, 
-                granted=True
-            ).first()
-            if user_permission:
-                return True
-                
-        except Exception as e:
-            current_app.logger.error(f"Error checking user permissions: {e}")
-            return False
+        if 'Admin' in _user_role_names(user):
+            return True
         
-        return False
+        # Check role and direct permissions from the per-request cache
+        return (resource, action) in _get_perm_set(user)
     except Exception as e:
         current_app.logger.error(f"Permission check failed: {e}")
         return False
@@ -81,7 +144,16 @@ def has_any_permission(user, resource, actions):
     Returns:
         bool: True if user has any of the permissions, False otherwise
     """
-    return any(has_permission(user, resource, action) for action in actions)
+    try:
+        if not user or not user.is_authenticated:
+            return False
+        if 'Admin' in _user_role_names(user):
+            return True
+        requested = {(resource, action) for action in actions}
+        return not requested.isdisjoint(_get_perm_set(user))
+    except Exception as e:
+        current_app.logger.error(f"Permission check failed: {e}")
+        return False
 
 def has_all_permissions(user, resource, actions):
     """
@@ -95,7 +167,16 @@ def has_all_permissions(user, resource, actions):
     Returns:
         bool: True if user has all permissions, False otherwise
     """
-    return all(has_permission(user, resource, action) for action in actions)
+    try:
+        if not user or not user.is_authenticated:
+            return False
+        if 'Admin' in _user_role_names(user):
+            return True
+        requested = {(resource, action) for action in actions}
+        return requested.issubset(_get_perm_set(user))
+    except Exception as e:
+        current_app.logger.error(f"Permission check failed: {e}")
+        return False
 
 def require_permission(resource, action, redirect_url=None, json_response=False):
     """
@@ -111,35 +192,7 @@ def require_permission(resource, action, redirect_url=None, json_response=False)
         @wraps(f)
         def decorated_function(*args, **kwargs):
             if not has_permission(current_user, resource, action):
-                # User-friendly error messages
-                error_messages = {
-                    ('deals', 'create'): 'You need permission to create deals. Please contact customer support.',
-                    ('deals', 'read'): 'You need permission to view deals. Please contact customer support.',
-                    ('deals', 'update'): 'You need permission to update deals. Please contact customer support.',
-                    ('deals', 'delete'): 'You need permission to delete deals. Please contact customer support.',
-                    ('banks', 'create'): 'You need permission to create banks. Please contact customer support.',
-                    ('banks', 'read'): 'You need permission to view banks. Please contact customer support.',
-                    ('organizations', 'create'): 'You need permission to create organizations. Please contact customer support.',
-                    ('organizations', 'read'): 'You need permission to view organizations. Please contact customer support.',
-                    ('organizations', 'update'): 'You need permission to modify organizations. Please contact customer support.',
-                    ('organizations', 'delete'): 'You need permission to delete organizations. Please contact customer support.',
-                    ('ai_matching', 'access_dashboard'): 'You need permission to access AI Matcher. Please contact customer support.',
-                    ('profiles', 'create'): 'You need permission to create profiles. Please contact customer support.',
-                    ('profiles', 'read'): 'You need permission to view profiles. Please contact customer support.',
-                    ('profiles', 'update'): 'You need permission to modify profiles. Please contact customer support.',
-                    ('profiles', 'delete'): 'You need permission to delete profiles. Please contact customer support.',
-                    ('items', 'create'): 'You need permission to create items. Please contact customer support.',
-                    ('items', 'read'): 'You need permission to view items. Please contact customer support.',
-                    ('items', 'update'): 'You need permission to modify items. Please contact customer support.',
-                    ('items', 'delete'): 'You need permission to delete items. Please contact customer support.',
-                    ('chatbots', 'read'): 'You need permission to use chatbots. Please contact customer support.',
-                    ('admin', 'access'): 'You need admin permissions to access this area. Please contact customer support.',
-                    ('admin', 'manage_items'): 'You need admin permissions to manage items. Please contact customer support.',
-                    ('admin', 'delete_any_item'): 'You need admin permissions to delete any item. Please contact customer support.',
-                    ('admin', 'verify_items'): 'You need admin permissions to verify items. Please contact customer support.'
-                }
-                
-                user_friendly_message = error_messages.get((resource, action), 'You need permission to access this feature. Please contact customer support.')
+                user_friendly_message = _ERROR_MESSAGES.get((resource, action), _DEFAULT_DENIED_MSG)
                 
                 if json_response:
                     return jsonify({
@@ -220,7 +273,7 @@ def admin_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user or not current_user.is_authenticated or not any(role.name == 'Admin' for role in current_user.roles):
+        if not current_user or not current_user.is_authenticated or 'Admin' not in _user_role_names(current_user):
             flash('Admin access required.', 'error')
             return redirect(url_for('auth.login'))
         return f(*args, **kwargs)
@@ -245,7 +298,7 @@ def require_admin_or_connector(f=None):
                 flash('Authentication required.', 'error')
                 return redirect(url_for('auth.login'))
             
-            if not (any(role.name == 'Admin' for role in current_user.roles) or any(role.name == 'Connector' for role in current_user.roles)):
+            if not (_user_role_names(current_user) & _ADMIN_OR_CONNECTOR):
                 flash('Admin or Connector access required.', 'error')
                 return redirect(request.referrer or url_for('index'))
             
@@ -269,8 +322,7 @@ def internal_staff_required(f):
             flash('Authentication required.', 'error')
             return redirect(url_for('auth.login'))
         
-        internal_roles = ['Admin', 'Connector', 'Collector', 'Verifier', 'Content Manager', 'Data Analyst', 'System Administrator']
-        if not any(any(user_role.name == role for user_role in current_user.roles) for role in internal_roles):
+        if not (_user_role_names(current_user) & _INTERNAL_ROLES):
             flash('Internal staff access required.', 'error')
             return redirect(request.referrer or url_for('index'))
         
@@ -289,7 +341,7 @@ def admin_item_management_required(f):
             return redirect(url_for('auth.login'))
         
         # Check if user has admin role
-        if not any(role.name == 'Admin' for role in current_user.roles):
+        if 'Admin' not in _user_role_names(current_user):
             flash('Admin access required for item management.', 'error')
             return redirect(url_for('auth.login'))
         
@@ -309,62 +361,30 @@ def get_user_permissions(user):
     if not user or not user.is_authenticated:
         return {}
     
-    permissions = {}
-    
-    # Get permissions from roles
-    for user_role in user.roles:
-        role = user_role.role if hasattr(user_role, 'role') else user_role
-        # Get role permissions from relational system
-        role_permissions = RolePermission.query.filter_by(role_id=role.id, granted=True).all()
-        for rp in role_permissions:
-            permission = Permission.query.get(rp.permission_id)
-            if permission:
-                resource = permission.resource
-                action = permission.action
-                if resource not in permissions:
-                    permissions[resource] = set()
-                permissions[resource].add(action)
-    
-    # Get direct user permissions
-    user_permissions = UserPermission.query.filter_by(user_id=user.id, granted=True).all()
-    for up in user_permissions:
-        permission = Permission.query.get(up.permission_id)
-        if permission:
-            resource = permission.resource
-            action = permission.action
-            if resource not in permissions:
-                permissions[resource] = set()
-            permissions[resource].add(action)
+    # Role and direct permissions come from the same two JOIN queries as has_permission
+    permissions = defaultdict(set)
+    for resource, action in _get_perm_set(user):
+        permissions[resource].add(action)
     
     # Convert sets to lists for JSON serialization
     return {resource: list(actions) for resource, actions in permissions.items()}
 
 def check_resource_access(user, resource, action, resource_owner_id=None):
     """
-    Check if user can access a specific resource, considering ownership
+    Check if user can access a specific resource; access requires the
+    resource/action permission, whether or not the user owns the resource
     
     Args:
         user: User object
         resource: String resource name
         action: String action name
-        resource_owner_id: ID of the resource owner (for ownership checks)
+        resource_owner_id: ID of the resource owner (kept for existing callers;
+            ownership does not change the result)
     
     Returns:
         bool: True if user has access, False otherwise
     """
-    # Check basic permission
-    if not has_permission(user, resource, action):
-        return False
-    
-    # If it's a read/update/delete action and user is the owner, allow it
-    if action in ['read', 'update', 'delete'] and resource_owner_id and user.id == resource_owner_id:
-        return True
-    
-    # If user has admin permissions, allow all actions
-    if has_permission(user, resource, action):
-        return True
-    
-    return False
+    return has_permission(user, resource, action)
 
 def get_accessible_resources(user, resource_type):
     """
@@ -384,18 +404,11 @@ def get_accessible_resources(user, resource_type):
     # For now, return empty list as a placeholder
     return []
 
-# Template helper functions
-def can_access(user, resource, action):
-    """Template helper to check permissions in Jinja2 templates"""
-    return has_permission(user, resource, action)
-
-def can_access_any(user, resource, actions):
-    """Template helper to check any permission in Jinja2 templates"""
-    return has_any_permission(user, resource, actions)
-
-def can_access_all(user, resource, actions):
-    """Template helper to check all permissions in Jinja2 templates"""
-    return has_all_permissions(user, resource, actions)
+# Template helper functions; these already check the per-request permission
+# set directly, so templates call them without an extra wrapper layer
+can_access = has_permission
+can_access_any = has_any_permission
+can_access_all = has_all_permissions
 
 # Make functions available in templates
 def register_template_helpers(app):
@@ -4,12 +4,103 @@ Updated permission checking utilities for the BankU application
 Uses the new relational permission tables instead of JSON
 """
 
+from collections import defaultdict
 from functools import wraps
-from flask import current_app, request, jsonify, redirect, url_for, flash
+from flask import current_app, request, jsonify, redirect, url_for, flash, g, has_app_context
 from flask_login import current_user
-from models import Role, UserRole, Permission, RolePermission, UserPermission
+from sqlalchemy import bindparam, delete, event, exists, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import db, Role, UserRole, Permission, RolePermission, UserPermission
 from datetime import datetime
 
+# Statements are built once at import so every call reuses SQLAlchemy's
+# compiled-statement cache; per-call values are passed as bound parameters
+_IS_ADMIN_STMT = select(exists().where(
+    UserRole.user_id == bindparam('user_id'),
+    UserRole.is_active == True,
+    UserRole.role_id == Role.id,
+    Role.name == 'Admin'
+))
+
+_ROLE_PERMISSIONS_STMT = select(Permission.resource, Permission.action).join(
+    RolePermission, RolePermission.permission_id == Permission.id
+).join(
+    UserRole, UserRole.role_id == RolePermission.role_id
+).where(
+    UserRole.user_id == bindparam('user_id'),
+    UserRole.is_active == True,
+    RolePermission.granted == True
+).distinct()
+
+_DIRECT_PERMISSIONS_STMT = select(Permission.resource, Permission.action).join(
+    UserPermission, UserPermission.permission_id == Permission.id
+).where(
+    UserPermission.user_id == bindparam('user_id'),
+    UserPermission.granted == True,
+    (UserPermission.expires_at.is_(None)) | (UserPermission.expires_at > bindparam('now'))
+)
+
+# Admin status and permission maps are only memoized on flask.g, so every request
+# reads the current grants and a change made by another worker applies on its next request
+def invalidate_user_permission_cache(user_id=None):
+    """Drop a user's admin status and permission map memoized for this request, or every user's if user_id is None"""
+    if not has_app_context():
+        return
+    for attr in ('_perm_admins', '_perm_maps'):
+        if user_id is None:
+            g.pop(attr, None)
+        else:
+            g.get(attr, {}).pop(user_id, None)
+
+def _is_admin(user_id):
+    """Check whether a user has an active Admin role, memoized for the rest of the request"""
+    request_cache = g.setdefault('_perm_admins', {})
+    if user_id not in request_cache:
+        request_cache[user_id] = bool(db.session.execute(_IS_ADMIN_STMT, {'user_id': user_id}).scalar())
+    return request_cache[user_id]
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_permission_change(session, flush_context):
+    """Invalidate cached permission maps when role or permission rows change"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (UserRole, UserPermission)):
+            invalidate_user_permission_cache(obj.user_id)
+        elif isinstance(obj, (Role, RolePermission, Permission)):
+            # Role-wide changes can affect any user
+            invalidate_user_permission_cache()
+            if isinstance(obj, Permission) and has_app_context():
+                g.pop('_perm_rows_by_name', None)
+                g.pop('_perm_rows_by_resource', None)
+
+def _load_user_permission_map(user_id):
+    """
+    Load a user's permission map from the database
+    
+    Returns:
+        dict: {resource: frozenset(actions)}
+    """
+    now = datetime.utcnow()
+    permissions = defaultdict(set)
+    
+    # Get permissions from all active roles in one query
+    role_rows = db.session.execute(_ROLE_PERMISSIONS_STMT, {'user_id': user_id}).all()
+    
+    # Get direct user permissions (not expired)
+    direct_rows = db.session.execute(_DIRECT_PERMISSIONS_STMT, {'user_id': user_id, 'now': now}).all()
+    
+    for resource, action in (*role_rows, *direct_rows):
+        permissions[resource].add(action)
+    
+    return {resource: frozenset(actions) for resource, actions in permissions.items()}
+
+def _cached_user_permissions(user_id):
+    """Get a user's permission map, memoized for the rest of the request"""
+    request_cache = g.setdefault('_perm_maps', {})
+    if user_id not in request_cache:
+        request_cache[user_id] = _load_user_permission_map(user_id)
+    return request_cache[user_id]
+
 def has_permission(user, resource, action):
     """
     Check if a user has permission to perform an action on a resource
@@ -27,60 +118,11 @@ def has_permission(user, resource, action):
         if not user or not user.is_authenticated:
             return False
         
-        # Super admin bypass (if user has Admin role)
-        try:
-            admin_role = Role.query.filter_by(name='Admin').first()
-            if admin_role:
-                user_role = UserRole.query.filter_by(
-                    user_id=user.id, 
-                    role_id=admin_role.id, 
-                    is_active=True
-                ).first()
-                if user_role:
-                    return True
-        except Exception as e:
-            current_app.logger.warning(f"Error checking admin role: {e}")
-        
-        # Check for direct user permission overrides (expired permissions are ignored)
-        try:
-            direct_permission = UserPermission.query.join(Permission).filter(
-                UserPermission.user_id == user.id,
-                Permission.resource == resource,
-                Permission.action == action,
-                UserPermission.granted == True,
-                (UserPermission.expires_at.is_(None)) | (UserPermission.expires_at > datetime.utcnow())
-            ).first()
-            
-            if direct_permission:
-                return True
-        except Exception as e:
-            current_app.logger.error(f"Error checking direct user permissions: {e}")
-        
-        # Check user's roles for the required permission
-        try:
-            # Get all active user roles
-            user_roles = UserRole.query.filter_by(
-                user_id=user.id, 
-                is_active=True
-            ).all()
-            
-            for user_role in user_roles:
-                # Check if this role has the required permission
-                role_permission = RolePermission.query.join(Permission).filter(
-                    RolePermission.role_id == user_role.role_id,
-                    Permission.resource == resource,
-                    Permission.action == action,
-                    RolePermission.granted == True
-                ).first()
-                
-                if role_permission:
-                    return True
-                    
-        except Exception as e:
-            current_app.logger.error(f"Error checking user role permissions: {e}")
-            return False
+        # Super admin bypass (if user has an active Admin role)
+        if _is_admin(user.id):
+            return True
         
-        return False
+        return action in _cached_user_permissions(user.id).get(resource, ())
         
     except Exception as e:
         current_app.logger.error(f"Permission check failed: {e}")
@@ -98,7 +140,15 @@ def has_any_permission(user, resource, actions):
     Returns:
         bool: True if user has any of the permissions, False otherwise
     """
-    return any(has_permission(user, resource, action) for action in actions)
+    try:
+        if not user or not user.is_authenticated:
+            return False
+        if _is_admin(user.id):
+            return True
+        return bool(_granted_actions(user, resource, actions))
+    except Exception as e:
+        current_app.logger.error(f"Permission check failed: {e}")
+        return False
 
 def has_all_permissions(user, resource, actions):
     """
@@ -112,7 +162,19 @@ def has_all_permissions(user, resource, actions):
     Returns:
         bool: True if user has all permissions, False otherwise
     """
-    return all(has_permission(user, resource, action) for action in actions)
+    try:
+        if not user or not user.is_authenticated:
+            return False
+        if _is_admin(user.id):
+            return True
+        return set(actions).issubset(_granted_actions(user, resource, actions))
+    except Exception as e:
+        current_app.logger.error(f"Permission check failed: {e}")
+        return False
+
+def _granted_actions(user, resource, actions):
+    """Get the subset of actions on a resource granted to a non-admin user"""
+    return _cached_user_permissions(user.id).get(resource, frozenset()).intersection(actions)
 
 def get_user_permissions(user):
     """
@@ -122,54 +184,46 @@ def get_user_permissions(user):
         user: User object
     
     Returns:
-        dict: Dictionary with resource as key and list of actions as value
+        dict: Dictionary with resource as key and frozenset of actions as value
     """
     try:
         if not user or not user.is_authenticated:
             return {}
         
-        permissions = {}
-        
-        # Get permissions from roles
-        user_roles = UserRole.query.filter_by(user_id=user.id, is_active=True).all()
-        
-        for user_role in user_roles:
-            role_permissions = RolePermission.query.join(Permission).filter(
-                RolePermission.role_id == user_role.role_id,
-                RolePermission.granted == True
-            ).all()
-            
-            for role_permission in role_permissions:
-                resource = role_permission.permission.resource
-                action = role_permission.permission.action
-                
-                if resource not in permissions:
-                    permissions[resource] = []
-                if action not in permissions[resource]:
-                    permissions[resource].append(action)
-        
-        # Get direct user permissions (not expired)
-        direct_permissions = UserPermission.query.join(Permission).filter(
-            UserPermission.user_id == user.id,
-            UserPermission.granted == True,
-            (UserPermission.expires_at.is_(None)) | (UserPermission.expires_at > datetime.utcnow())
-        ).all()
-        
-        for direct_permission in direct_permissions:
-            resource = direct_permission.permission.resource
-            action = direct_permission.permission.action
-            
-            if resource not in permissions:
-                permissions[resource] = []
-            if action not in permissions[resource]:
-                permissions[resource].append(action)
-        
-        return permissions
+        # Copy the cached map; its action sets are already frozensets
+        return dict(_cached_user_permissions(user.id))
         
     except Exception as e:
         current_app.logger.error(f"Error getting user permissions: {e}")
         return {}
 
+# User-friendly error messages for require_permission
+_PERMISSION_ERROR_MESSAGES = {
+    ('deals', 'create'): 'You need permission to create deals. Please contact customer support.',
+    ('deals', 'view'): 'You need permission to view deals. Please contact customer support.',
+    ('deals', 'edit'): 'You need permission to update deals. Please contact customer support.',
+    ('deals', 'delete'): 'You need permission to delete deals. Please contact customer support.',
+    ('banks', 'create'): 'You need permission to create banks. Please contact customer support.',
+    ('banks', 'view'): 'You need permission to view banks. Please contact customer support.',
+    ('organizations', 'create'): 'You need permission to create organizations. Please contact customer support.',
+    ('organizations', 'view'): 'You need permission to view organizations. Please contact customer support.',
+    ('organizations', 'edit'): 'You need permission to modify organizations. Please contact customer support.',
+    ('organizations', 'delete'): 'You need permission to delete organizations. Please contact customer support.',
+    ('ai_matching', 'access_dashboard'): 'You need permission to access AI Matcher. Please contact customer support.',
+    ('profiles', 'create'): 'You need permission to create profiles. Please contact customer support.',
+    ('profiles', 'view'): 'You need permission to view profiles. Please contact customer support.',
+    ('profiles', 'edit'): 'You need permission to edit profiles. Please contact customer support.',
+    ('profiles', 'delete'): 'You need permission to delete profiles. Please contact customer support.',
+    ('users', 'create'): 'You need permission to create users. Please contact customer support.',
+    ('users', 'view'): 'You need permission to view users. Please contact customer support.',
+    ('users', 'edit'): 'You need permission to edit users. Please contact customer support.',
+    ('users', 'delete'): 'You need permission to delete users. Please contact customer support.',
+    ('admin', 'access'): 'You need admin access. Please contact customer support.',
+    ('deal_requests', 'create'): 'You need permission to create deal requests. Please contact customer support.',
+    ('deal_requests', 'view_own'): 'You need permission to view your deal requests. Please contact customer support.',
+    ('deal_requests', 'view_all'): 'You need permission to view all deal requests. Please contact customer support.',
+}
+
 def require_permission(resource, action, redirect_url=None, json_response=False):
     """
     Decorator to require a specific permission for a route
@@ -181,40 +235,15 @@ def require_permission(resource, action, redirect_url=None, json_response=False)
         redirect_url: URL to redirect to if permission denied
         json_response: If True, return JSON error instead of redirect
     """
+    error_message = _PERMISSION_ERROR_MESSAGES.get((resource, action),
+        f'You need permission to perform "{action}" on "{resource}". Please contact customer support.')
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not has_permission(current_user, resource, action):
-                # User-friendly error messages
-                error_messages = {
-                    ('deals', 'create'): 'You need permission to create deals. Please contact customer support.',
-                    ('deals', 'view'): 'You need permission to view deals. Please contact customer support.',
-                    ('deals', 'edit'): 'You need permission to update deals. Please contact customer support.',
-                    ('deals', 'delete'): 'You need permission to delete deals. Please contact customer support.',
-                    ('banks', 'create'): 'You need permission to create banks. Please contact customer support.',
-                    ('banks', 'view'): 'You need permission to view banks. Please contact customer support.',
-                    ('organizations', 'create'): 'You need permission to create organizations. Please contact customer support.',
-                    ('organizations', 'view'): 'You need permission to view organizations. Please contact customer support.',
-                    ('organizations', 'edit'): 'You need permission to modify organizations. Please contact customer support.',
-                    ('organizations', 'delete'): 'You need permission to delete organizations. Please contact customer support.',
-                    ('ai_matching', 'access_dashboard'): 'You need permission to access AI Matcher. Please contact customer support.',
-                    ('profiles', 'create'): 'You need permission to create profiles. Please contact customer support.',
-                    ('profiles', 'view'): 'You need permission to view profiles. Please contact customer support.',
-                    ('profiles', 'edit'): 'You need permission to edit profiles. Please contact customer support.',
-                    ('profiles', 'delete'): 'You need permission to delete profiles. Please contact customer support.',
-                    ('users', 'create'): 'You need permission to create users. Please contact customer support.',
-                    ('users', 'view'): 'You need permission to view users. Please contact customer support.',
-                    ('users', 'edit'): 'You need permission to edit users. Please contact customer support.',
-                    ('users', 'delete'): 'You need permission to delete users. Please contact customer support.',
-                    ('admin', 'access'): 'You need admin access. Please contact customer support.',
-                    ('deal_requests', 'create'): 'You need permission to create deal requests. Please contact customer support.',
-                    ('deal_requests', 'view_own'): 'You need permission to view your deal requests. Please contact customer support.',
-                    ('deal_requests', 'view_all'): 'You need permission to view all deal requests. Please contact customer support.',
-                }
-                
-                error_message = error_messages.get((resource, action), 
-                    f'You need permission to perform "{action}" on "{resource}". Please contact customer support.')
-                
+            # Resolve the current_user proxy once for all checks below
+            user = current_user._get_current_object()
+            if not has_permission(user, resource, action):
                 if json_response:
                     return jsonify({
                         'success': False,
@@ -238,14 +267,18 @@ def require_any_permission(resource, actions, redirect_url=None, json_response=F
     """
     Decorator to require any of the specified permissions for a route
     """
+    required_message = f'Insufficient permissions. Required: {resource}:{actions}'
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not has_any_permission(current_user, resource, actions):
+            # Resolve the current_user proxy once for all checks below
+            user = current_user._get_current_object()
+            if not has_any_permission(user, resource, actions):
                 if json_response:
                     return jsonify({
                         'success': False,
-                        'message': f'Insufficient permissions. Required: {resource}:{actions}',
+                        'message': required_message,
                         'error': 'permission_denied'
                     }), 403
                 else:
@@ -264,14 +297,18 @@ def require_all_permissions(resource, actions, redirect_url=None, json_response=
     """
     Decorator to require all of the specified permissions for a route
     """
+    required_message = f'Insufficient permissions. Required: {resource}:{actions}'
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not has_all_permissions(current_user, resource, actions):
+            # Resolve the current_user proxy once for all checks below
+            user = current_user._get_current_object()
+            if not has_all_permissions(user, resource, actions):
                 if json_response:
                     return jsonify({
                         'success': False,
-                        'message': f'Insufficient permissions. Required: {resource}:{actions}',
+                        'message': required_message,
                         'error': 'permission_denied'
                     }), 403
                 else:
@@ -286,6 +323,42 @@ def require_all_permissions(resource, actions, redirect_url=None, json_response=
         return decorated_function
     return decorator
 
+# Columns refreshed when a direct permission is granted again
+_GRANT_UPDATE_COLUMNS = ('granted', 'granted_by', 'granted_at', 'expires_at')
+
+def _upsert_user_permissions(rows):
+    """
+    Insert direct user permission rows, refreshing the grant columns of rows
+    that already exist for (user_id, permission_id), in a single statement
+    """
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect == 'mysql':
+        stmt = mysql.insert(UserPermission).values(rows)
+        stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in _GRANT_UPDATE_COLUMNS})
+    elif dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(UserPermission).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'permission_id'],
+            set_={col: stmt.excluded[col] for col in _GRANT_UPDATE_COLUMNS}
+        )
+    else:
+        # No native upsert; fall back to select-then-write per row
+        for row in rows:
+            existing = UserPermission.query.filter_by(
+                user_id=row['user_id'],
+                permission_id=row['permission_id']
+            ).first()
+            if existing:
+                for col in _GRANT_UPDATE_COLUMNS:
+                    setattr(existing, col, row[col])
+            else:
+                db.session.add(UserPermission(**row))
+        return
+    
+    db.session.execute(stmt)
+
 def grant_user_permission(user_id, permission_id, granted_by=None, expires_at=None):
     """
     Grant a direct permission to a user (override role permissions)
@@ -296,39 +369,43 @@ def grant_user_permission(user_id, permission_id, granted_by=None, expires_at=No
         granted_by: User ID who granted the permission
         expires_at: Optional expiration datetime
     
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    return grant_user_permissions_bulk([(user_id, permission_id, granted_by, expires_at)])
+
+def grant_user_permissions_bulk(grants):
+    """
+    Grant many direct permissions in a single statement
+    
+    Args:
+        grants: Iterable of (user_id, permission_id, granted_by, expires_at) tuples
+    
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Check if permission already exists
-        existing = UserPermission.query.filter_by(
-            user_id=user_id,
-            permission_id=permission_id
-        ).first()
+        now = datetime.utcnow()
+        rows = [{
+            'user_id': user_id,
+            'permission_id': permission_id,
+            'granted': True,
+            'granted_by': granted_by,
+            'granted_at': now,
+            'expires_at': expires_at
+        } for user_id, permission_id, granted_by, expires_at in grants]
+        if not rows:
+            return True
         
-        if existing:
-            # Update existing permission
-            existing.granted = True
-            existing.granted_by = granted_by
-            existing.granted_at = datetime.utcnow()
-            existing.expires_at = expires_at
-        else:
-            # Create new permission
-            user_permission = UserPermission(
-                user_id=user_id,
-                permission_id=permission_id,
-                granted=True,
-                granted_by=granted_by,
-                granted_at=datetime.utcnow(),
-                expires_at=expires_at
-            )
-            db.session.add(user_permission)
+        _upsert_user_permissions(rows)
         
         db.session.commit()
+        for user_id in {row['user_id'] for row in rows}:
+            invalidate_user_permission_cache(user_id)
         return True
         
     except Exception as e:
-        current_app.logger.error(f"Error granting user permission: {e}")
+        current_app.logger.error(f"Error granting user permissions: {e}")
         db.session.rollback()
         return False
 
@@ -343,23 +420,38 @@ def revoke_user_permission(user_id, permission_id):
     Returns:
         bool: True if successful, False otherwise
     """
+    return revoke_user_permissions_bulk([(user_id, permission_id)]) > 0
+
+def revoke_user_permissions_bulk(pairs):
+    """
+    Revoke many direct permissions in a single DELETE
+    
+    Args:
+        pairs: Iterable of (user_id, permission_id) tuples
+    
+    Returns:
+        int: Number of permissions revoked (0 on error)
+    """
     try:
-        user_permission = UserPermission.query.filter_by(
-            user_id=user_id,
-            permission_id=permission_id
-        ).first()
+        pairs = list(pairs)
+        if not pairs:
+            return 0
         
-        if user_permission:
-            db.session.delete(user_permission)
-            db.session.commit()
-            return True
+        result = db.session.execute(
+            delete(UserPermission)
+            .where(tuple_(UserPermission.user_id, UserPermission.permission_id).in_(pairs))
+            .execution_options(synchronize_session=False)
+        )
         
-        return False
+        db.session.commit()
+        for user_id in {user_id for user_id, _ in pairs}:
+            invalidate_user_permission_cache(user_id)
+        return result.rowcount
         
     except Exception as e:
-        current_app.logger.error(f"Error revoking user permission: {e}")
+        current_app.logger.error(f"Error revoking user permissions: {e}")
         db.session.rollback()
-        return False
+        return 0
 
 def get_permission_by_name(permission_name):
     """
@@ -372,7 +464,11 @@ def get_permission_by_name(permission_name):
         Permission object or None
     """
     try:
-        return Permission.query.filter_by(name=permission_name).first()
+        # Memoized for the rest of the request
+        request_cache = g.setdefault('_perm_rows_by_name', {})
+        if permission_name not in request_cache:
+            request_cache[permission_name] = Permission.query.filter_by(name=permission_name).first()
+        return request_cache[permission_name]
     except Exception as e:
         current_app.logger.error(f"Error getting permission by name: {e}")
         return None
@@ -388,8 +484,11 @@ def get_permissions_by_resource(resource):
         List of Permission objects
     """
     try:
-        return Permission.query.filter_by(resource=resource).all()
+        # Memoized for the rest of the request
+        request_cache = g.setdefault('_perm_rows_by_resource', {})
+        if resource not in request_cache:
+            request_cache[resource] = Permission.query.filter_by(resource=resource).all()
+        return list(request_cache[resource])
     except Exception as e:
         current_app.logger.error(f"Error getting permissions by resource: {e}")
         return []
-
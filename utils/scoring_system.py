@@ -4,70 +4,242 @@ Scoring System for BankU Items
 Implements visibility, credibility, and review scoring
 """
 
+import json
+import logging
+import math
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only
 from models import (
     db, Item, ItemField, ItemVisibilityScore, ItemCredibilityScore, 
     ItemReviewScore, ItemInteraction, User, Profile, Review
 )
 
+logger = logging.getLogger(__name__)
+
+# Number of items rescored per transaction in update_all_item_scores
+SCORING_BATCH_SIZE = 500
+
+# Worker threads rescoring batches concurrently in update_all_item_scores; each
+# batch runs in its own app context, so it gets its own session and connection
+# and its session state is released as soon as it finishes
+SCORING_WORKERS = 4
+
+# Item failures logged per rescoring batch, so a systemic error doesn't flood the log
+SCORING_FAILURE_LOG_LIMIT = 100
+
+# Review aggregates consumed by _review_values, in order: review count,
+# average non-zero rating, count of each rating 1-5, detailed review count
+_REVIEW_AGGREGATES = (
+    func.count(Review.id),
+    func.avg(case((Review.rating != 0, Review.rating))),
+    *(func.sum(case((Review.rating == rating, 1), else_=0)) for rating in range(1, 6)),
+    func.sum(case((func.char_length(Review.comment) > 50, 1), else_=0))
+)
+
+# Item columns consumed by _visibility_values_from_columns, in order, plus the
+# item's additional field count; media flags are not columns on Item
+_VISIBILITY_COLUMNS = (
+    Item.title,
+    Item.short_description,
+    Item.detailed_description,
+    Item.category,
+    Item.tags,
+    Item.location,
+    Item.price,
+    select(func.count(ItemField.id)).where(ItemField.item_id == Item.id).correlate(Item).scalar_subquery()
+)
+
+# Creator (User) columns read by _credibility_values
+_CREATOR_COLUMNS = (
+    User.email_verified,
+    User.phone_verified,
+    User.is_verified,
+    User.first_name,
+    User.last_name,
+    User.email,
+    User.bio,
+    User.location,
+    User.phone,
+    User.avatar,
+    User.created_at
+)
+
+# Optional media attributes checked on items: images, files, videos, attachments
+_MEDIA_ATTRS = ('images', 'files', 'videos', 'attachments')
+
+def _visibility_features(title, short_description, detailed_description, category,
+                         tags, location, price, fields_count, media_flags):
+    """
+    Reduce an item's visibility inputs to the small integer features its
+    sub-scores depend on
+    Returns: feature tuple consumed by _visibility_subscores
+    """
+    detail_bucket = 0
+    if detailed_description:
+        desc_length = len(detailed_description)
+        detail_bucket = 4 if desc_length > 500 else 3 if desc_length > 200 else 2 if desc_length > 100 else 1
+    
+    return (
+        bool(title), bool(title and title.strip()),
+        bool(short_description), bool(short_description and short_description.strip()),
+        detail_bucket, bool(detailed_description and len(detailed_description.strip()) > 50),
+        bool(category), bool(category and category.strip()),
+        min(fields_count or 0, 10),  # additional fields stop scoring after 10
+        *media_flags,
+        bool(tags), bool(location), bool(price)
+    )
+
+def _visibility_subscores(features):
+    """
+    Calculate the essential, additional (question-based), media and detail
+    sub-scores from a feature tuple (see _visibility_features)
+    Returns: tuple of four ints (each 0-100)
+    """
+    (has_title, title_filled, has_short_description, short_description_filled,
+     detail_bucket, detailed_description_long, has_category, category_filled, fields_count,
+     has_images, has_files, has_videos, has_attachments, has_tags, has_location, has_price) = features
+    
+    # Essential Fields Score - 25 points per core item field present
+    essential_score = 25 * (has_title + has_short_description + (detail_bucket > 0) + has_category)
+    
+    # Additional Fields Score - Based on chatbot question points: title 25,
+    # short description 20, long detailed description 20, category 15, up to
+    # 20 for additional fields, 10 per image/file/attachment, location and price 5
+    additional_score = (25 * title_filled + 20 * short_description_filled +
+                        20 * detailed_description_long + 15 * category_filled +
+                        min(20, fields_count * 2) +
+                        10 * has_images + 10 * has_files + 10 * has_attachments +
+                        5 * has_location + 5 * has_price)
+    
+    # Media Score
+    media_score = 30 * has_images + 20 * has_files + 30 * has_videos + 20 * has_attachments
+    
+    # Detail Score - description length, then tags, location and pricing
+    detail_score = (0, 10, 20, 30, 40)[detail_bucket] + 20 * has_tags + 20 * has_location + 20 * has_price
+    
+    return (min(100, essential_score), min(100, additional_score),
+            min(100, media_score), min(100, detail_score))
+
+# Level buckets: ascending percentage thresholds and the label for each bucket;
+# a percentage at or above a threshold falls into the next bucket up
+_VISIBILITY_LEVELS = ((40, 60, 80), ('low', 'medium', 'high', 'premium'))
+_TRUST_LEVELS = ((40, 60, 80), ('low', 'medium', 'high', 'verified'))
+_REVIEW_LEVELS = ((20, 40, 60, 80), ('none', 'low', 'medium', 'high', 'excellent'))
+
+def _level_for(levels, percentage):
+    """Label of the bucket a percentage falls into (see _VISIBILITY_LEVELS)"""
+    thresholds, labels = levels
+    return labels[bisect_right(thresholds, percentage)]
+
 class ScoringSystem:
     """Main scoring system class"""
     
     @staticmethod
-    def calculate_question_based_score(item):
+    def _apply_values(score_record, values):
+        """Copy calculated column values onto a score record"""
+        for column, value in values.items():
+            setattr(score_record, column, value)
+    
+    @staticmethod
+    def _media_flags(item):
+        """Presence flags for an item's optional media attributes (see _MEDIA_ATTRS)"""
+        return tuple(bool(getattr(item, attr, None)) for attr in _MEDIA_ATTRS)
+    
+    @staticmethod
+    def _count_additional_fields(item):
+        """Number of additional fields on an item, counted in SQL unless already loaded"""
+        if 'additional_fields' in item.__dict__:
+            return len(item.additional_fields)
+        return db.session.query(func.count(ItemField.id)).filter(ItemField.item_id == item.id).scalar() or 0
+    
+    @staticmethod
+    def calculate_question_based_score(item, fields_count=None):
         """
         Calculate visibility score based on chatbot question points
         This method looks at which questions were answered and their point values
+        fields_count: optional number of additional fields, if already known
         """
         try:
             # For now, we'll use a simplified approach based on item data completeness
             # In a full implementation, you'd track the relationship between items and chatbot completions
             
-            # Calculate score based on how much data the item has
-            score = 0
-            
-            # Check for essential fields
-            if hasattr(item, 'title') and item.title and len(item.title.strip()) > 0:
-                score += 25  # Title is worth 25 points
-            
-            if hasattr(item, 'short_description') and item.short_description and len(item.short_description.strip()) > 0:
-                score += 20  # Short description is worth 20 points
-            
-            if hasattr(item, 'detailed_description') and item.detailed_description and len(item.detailed_description.strip()) > 50:
-                score += 20  # Detailed description is worth 20 points
-            
-            if hasattr(item, 'category') and item.category and len(item.category.strip()) > 0:
-                score += 15  # Category is worth 15 points
+            if fields_count is None:
+                fields_count = ScoringSystem._count_additional_fields(item)
             
-            # Check for additional fields
-            additional_fields = ItemField.query.filter_by(item_id=item.id).all()
-            if additional_fields:
-                score += min(20, len(additional_fields) * 2)  # Up to 20 points for additional fields
-            
-            # Check for media/attachments
-            if hasattr(item, 'images') and item.images:
-                score += 10
-            if hasattr(item, 'files') and item.files:
-                score += 10
-            if hasattr(item, 'attachments') and item.attachments:
-                score += 10
-            
-            # Check for location
-            if hasattr(item, 'location') and item.location:
-                score += 5
-            
-            # Check for pricing
-            if hasattr(item, 'price') and item.price:
-                score += 5
-            
-            return min(100, score)
+            features = _visibility_features(
+                item.title, item.short_description, item.detailed_description, item.category,
+                item.tags, item.location, item.price, fields_count,
+                ScoringSystem._media_flags(item)
+            )
+            return _visibility_subscores(features)[1]
             
-        except Exception as e:
-            print(f"Error calculating question-based score for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error calculating question-based score for item %s", item.id)
             return 0
     
     @staticmethod
-    def calculate_visibility_score(item):
+    def _visibility_values(item, fields_count=None, now=None):
+        """
+        Calculate the ItemVisibilityScore column values for an item
+        fields_count: optional number of additional fields, if already known
+        now: optional calculation timestamp, shared across a batch
+        Returns: dict of column values
+        """
+        if fields_count is None:
+            fields_count = ScoringSystem._count_additional_fields(item)
+        
+        return ScoringSystem._visibility_values_from_columns(
+            item.title, item.short_description, item.detailed_description, item.category,
+            item.tags, item.location, item.price, fields_count,
+            ScoringSystem._media_flags(item), now=now
+        )
+    
+    @staticmethod
+    def _visibility_values_from_columns(title, short_description, detailed_description, category,
+                                        tags, location, price, fields_count,
+                                        media_flags=(False, False, False, False), now=None):
+        """
+        Calculate the ItemVisibilityScore column values from plain column values
+        (see _VISIBILITY_COLUMNS), so bulk rescoring needs no ORM objects
+        now: optional calculation timestamp, shared across a batch
+        Returns: dict of column values
+        """
+        essential_score, additional_score, media_score, detail_score = _visibility_subscores(
+            _visibility_features(title, short_description, detailed_description, category,
+                                 tags, location, price, fields_count, media_flags)
+        )
+        
+        values = {
+            'essential_fields_score': essential_score,
+            'additional_fields_score': additional_score,
+            'media_score': media_score,
+            'detail_score': detail_score
+        }
+        
+        # Calculate total score (0-400)
+        total_score = (values['essential_fields_score'] +
+                      values['additional_fields_score'] +
+                      values['media_score'] +
+                      values['detail_score'])
+        
+        values['total_visibility_score'] = total_score
+        values['visibility_percentage'] = (total_score / 400) * 100
+        
+        # Determine visibility level
+        values['visibility_level'] = _level_for(_VISIBILITY_LEVELS, values['visibility_percentage'])
+        
+        values['last_calculated'] = now or datetime.utcnow()
+        values['calculation_version'] = '1.0'
+        
+        return values
+    
+    @staticmethod
+    def calculate_visibility_score(item, commit=True, now=None):
         """
         Calculate visibility score based on data completeness and question points
         Returns: ItemVisibilityScore object
@@ -79,96 +251,155 @@ class ScoringSystem:
                 visibility_score = ItemVisibilityScore(item_id=item.id)
                 db.session.add(visibility_score)
             
-            # Essential Fields Score (0-100) - Based on core item fields
-            essential_score = 0
-            essential_fields = ['title', 'short_description', 'detailed_description', 'category']
-            
-            for field in essential_fields:
-                if hasattr(item, field) and getattr(item, field):
-                    if field == 'detailed_description' and len(str(getattr(item, field))) > 50:
-                        essential_score += 25
-                    elif field == 'short_description' and len(str(getattr(item, field))) > 20:
-                        essential_score += 25
-                    else:
-                        essential_score += 25
-            
-            # Additional Fields Score (0-100) - Based on chatbot question points
-            additional_score = ScoringSystem.calculate_question_based_score(item)
-            
-            # Media Score (0-100)
-            media_score = 0
-            if hasattr(item, 'images') and item.images:
-                media_score += 30
-            if hasattr(item, 'files') and item.files:
-                media_score += 20
-            if hasattr(item, 'videos') and item.videos:
-                media_score += 30
-            if hasattr(item, 'attachments') and item.attachments:
-                media_score += 20
-            
-            # Detail Score (0-100)
-            detail_score = 0
-            if hasattr(item, 'detailed_description') and item.detailed_description:
-                desc_length = len(item.detailed_description)
-                if desc_length > 500:
-                    detail_score += 40
-                elif desc_length > 200:
-                    detail_score += 30
-                elif desc_length > 100:
-                    detail_score += 20
-                else:
-                    detail_score += 10
-            
-            # Tags and keywords
-            if hasattr(item, 'tags') and item.tags and len(item.tags) > 0:
-                detail_score += 20
-            
-            # Location information
-            if hasattr(item, 'location') and item.location:
-                detail_score += 20
-            
-            # Pricing information
-            if hasattr(item, 'price') and item.price:
-                detail_score += 20
-            
-            # Update scores
-            visibility_score.essential_fields_score = min(100, essential_score)
-            visibility_score.additional_fields_score = min(100, additional_score)
-            visibility_score.media_score = min(100, media_score)
-            visibility_score.detail_score = min(100, detail_score)
-            
-            # Calculate total score (0-400)
-            total_score = (visibility_score.essential_fields_score + 
-                          visibility_score.additional_fields_score + 
-                          visibility_score.media_score + 
-                          visibility_score.detail_score)
-            
-            visibility_score.total_visibility_score = total_score
-            visibility_score.visibility_percentage = (total_score / 400) * 100
-            
-            # Determine visibility level
-            if visibility_score.visibility_percentage >= 80:
-                visibility_score.visibility_level = 'premium'
-            elif visibility_score.visibility_percentage >= 60:
-                visibility_score.visibility_level = 'high'
-            elif visibility_score.visibility_percentage >= 40:
-                visibility_score.visibility_level = 'medium'
-            else:
-                visibility_score.visibility_level = 'low'
-            
-            visibility_score.last_calculated = datetime.utcnow()
-            visibility_score.calculation_version = '1.0'
+            ScoringSystem._apply_values(visibility_score, ScoringSystem._visibility_values(item, now=now))
             
-            db.session.commit()
+            if commit:
+                db.session.commit()
             return visibility_score
             
-        except Exception as e:
-            print(f"Error calculating visibility score for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error calculating visibility score for item %s", item.id)
+            if not commit:
+                # Let the batch caller decide what to do with its transaction
+                raise
             db.session.rollback()
             return None
     
     @staticmethod
-    def calculate_credibility_score(item):
+    def _credibility_values(item_verified, creator, now=None):
+        """
+        Calculate the ItemCredibilityScore column values for an item and its creator
+        item_verified: the item's is_verified flag
+        creator: the creator User, or any row with the _CREATOR_COLUMNS attributes
+        now: optional calculation timestamp, shared across a batch
+        Returns: dict of column values
+        """
+        now = now or datetime.utcnow()
+        
+        if not creator:
+            # No creator found, set default low scores
+            return {
+                'total_credibility_score': 0,
+                'credibility_percentage': 0.0,
+                'trust_level': 'low',
+                'last_calculated': now
+            }
+        
+        values = {}
+        
+        email_verified = creator.email_verified
+        phone_verified = creator.phone_verified
+        id_verified = creator.is_verified
+        
+        # User Verification (0-200 points)
+        user_verification_score = 0
+        verification_badges = []
+        
+        if email_verified:
+            user_verification_score += 50
+            verification_badges.append('email_verified')
+        
+        if phone_verified:
+            user_verification_score += 50
+            verification_badges.append('phone_verified')
+        
+        if id_verified:
+            user_verification_score += 50
+            verification_badges.append('id_verified')
+        
+        # Social verification (placeholder for future implementation)
+        social_verified = False  # This would be implemented later
+        if social_verified:
+            user_verification_score += 50
+            verification_badges.append('social_verified')
+        
+        # Item Verification (0-150 points)
+        item_verification_score = 0
+        
+        if item_verified:
+            item_verification_score += 50
+            values['item_verified'] = True
+        
+        # Admin approval (placeholder)
+        admin_approved = False  # This would be set by admin actions
+        if admin_approved:
+            item_verification_score += 50
+            values['admin_approved'] = True
+        
+        # Quality check (placeholder)
+        quality_checked = False  # This would be set by quality checks
+        if quality_checked:
+            item_verification_score += 50
+            values['quality_checked'] = True
+        
+        # Profile Completeness (0-100 points)
+        profile_completeness_score = 0
+        
+        # Check if user has complete profile
+        if creator.first_name and creator.last_name and creator.email:
+            profile_completeness_score += 30
+            values['profile_complete'] = True
+        
+        if creator.bio and len(creator.bio) > 20:
+            profile_completeness_score += 20
+            values['bio_complete'] = True
+        
+        if creator.location:
+            profile_completeness_score += 20
+            values['location_added'] = True
+        
+        # Additional profile fields
+        if creator.phone:
+            profile_completeness_score += 15
+        
+        if creator.avatar:
+            profile_completeness_score += 15
+        
+        # Trust Indicators (0-50 points)
+        trust_score = 0
+        
+        # Account age (older accounts are more trusted)
+        created_at = creator.created_at
+        if created_at:
+            days_old = (now - created_at).days
+            if days_old > 365:
+                trust_score += 20
+            elif days_old > 180:
+                trust_score += 15
+            elif days_old > 90:
+                trust_score += 10
+            elif days_old > 30:
+                trust_score += 5
+        
+        # Activity level (more active users are more trusted)
+        # This would be calculated based on user activity
+        activity_score = 0  # Placeholder for future implementation
+        trust_score += activity_score
+        
+        # Update scores
+        values['email_verified'] = email_verified
+        values['phone_verified'] = phone_verified
+        values['id_verified'] = id_verified
+        values['social_verified'] = social_verified
+        values['verification_badges'] = verification_badges
+        
+        # Calculate total score (0-500)
+        total_score = (user_verification_score + item_verification_score +
+                      profile_completeness_score + trust_score)
+        
+        values['total_credibility_score'] = min(500, total_score)
+        values['credibility_percentage'] = (values['total_credibility_score'] / 500) * 100
+        
+        # Determine trust level
+        values['trust_level'] = _level_for(_TRUST_LEVELS, values['credibility_percentage'])
+        
+        values['last_calculated'] = now
+        values['calculation_version'] = '1.0'
+        
+        return values
+    
+    @staticmethod
+    def calculate_credibility_score(item, commit=True, now=None):
         """
         Calculate credibility score based on user verification
         Returns: ItemCredibilityScore object
@@ -182,143 +413,155 @@ class ScoringSystem:
             
             # Get the item's creator (user)
             creator = None
-            if hasattr(item, 'profile_id') and item.profile_id:
-                profile = Profile.query.get(item.profile_id)
-                if profile and profile.user_id:
-                    creator = User.query.get(profile.user_id)
-            
-            if not creator:
-                # No creator found, set default low scores
-                credibility_score.total_credibility_score = 0
-                credibility_score.credibility_percentage = 0.0
-                credibility_score.trust_level = 'low'
-                credibility_score.last_calculated = datetime.utcnow()
-                db.session.commit()
-                return credibility_score
-            
-            # User Verification (0-200 points)
-            user_verification_score = 0
-            verification_badges = []
-            
-            if creator.email_verified:
-                user_verification_score += 50
-                verification_badges.append('email_verified')
-            
-            if creator.phone_verified:
-                user_verification_score += 50
-                verification_badges.append('phone_verified')
-            
-            if creator.is_verified:
-                user_verification_score += 50
-                verification_badges.append('id_verified')
-            
-            # Social verification (placeholder for future implementation)
-            social_verified = False  # This would be implemented later
-            if social_verified:
-                user_verification_score += 50
-                verification_badges.append('social_verified')
-            
-            # Item Verification (0-150 points)
-            item_verification_score = 0
-            
-            if hasattr(item, 'is_verified') and item.is_verified:
-                item_verification_score += 50
-                credibility_score.item_verified = True
-            
-            # Admin approval (placeholder)
-            admin_approved = False  # This would be set by admin actions
-            if admin_approved:
-                item_verification_score += 50
-                credibility_score.admin_approved = True
-            
-            # Quality check (placeholder)
-            quality_checked = False  # This would be set by quality checks
-            if quality_checked:
-                item_verification_score += 50
-                credibility_score.quality_checked = True
-            
-            # Profile Completeness (0-100 points)
-            profile_completeness_score = 0
-            
-            # Check if user has complete profile
-            if creator.first_name and creator.last_name and creator.email:
-                profile_completeness_score += 30
-                credibility_score.profile_complete = True
-            
-            if creator.bio and len(creator.bio) > 20:
-                profile_completeness_score += 20
-                credibility_score.bio_complete = True
-            
-            if creator.location:
-                profile_completeness_score += 20
-                credibility_score.location_added = True
-            
-            # Additional profile fields
-            if creator.phone:
-                profile_completeness_score += 15
-            
-            if creator.avatar:
-                profile_completeness_score += 15
-            
-            # Trust Indicators (0-50 points)
-            trust_score = 0
-            
-            # Account age (older accounts are more trusted)
-            if creator.created_at:
-                days_old = (datetime.utcnow() - creator.created_at).days
-                if days_old > 365:
-                    trust_score += 20
-                elif days_old > 180:
-                    trust_score += 15
-                elif days_old > 90:
-                    trust_score += 10
-                elif days_old > 30:
-                    trust_score += 5
-            
-            # Activity level (more active users are more trusted)
-            # This would be calculated based on user activity
-            activity_score = 0  # Placeholder for future implementation
-            trust_score += activity_score
-            
-            # Update scores
-            credibility_score.email_verified = creator.email_verified
-            credibility_score.phone_verified = creator.phone_verified
-            credibility_score.id_verified = creator.is_verified
-            credibility_score.social_verified = social_verified
-            credibility_score.verification_badges = verification_badges
-            
-            # Calculate total score (0-500)
-            total_score = (user_verification_score + item_verification_score + 
-                          profile_completeness_score + trust_score)
-            
-            credibility_score.total_credibility_score = min(500, total_score)
-            credibility_score.credibility_percentage = (credibility_score.total_credibility_score / 500) * 100
-            
-            # Determine trust level
-            if credibility_score.credibility_percentage >= 80:
-                credibility_score.trust_level = 'verified'
-            elif credibility_score.credibility_percentage >= 60:
-                credibility_score.trust_level = 'high'
-            elif credibility_score.credibility_percentage >= 40:
-                credibility_score.trust_level = 'medium'
-            else:
-                credibility_score.trust_level = 'low'
+            if item.profile_id:
+                user_id = db.session.query(Profile.user_id).filter(Profile.id == item.profile_id).scalar()
+                if user_id:
+                    creator = db.session.get(User, user_id, options=[load_only(*_CREATOR_COLUMNS)])
             
-            credibility_score.last_calculated = datetime.utcnow()
-            credibility_score.calculation_version = '1.0'
+            ScoringSystem._apply_values(credibility_score, ScoringSystem._credibility_values(item.is_verified, creator, now=now))
             
-            db.session.commit()
+            if commit:
+                db.session.commit()
             return credibility_score
             
-        except Exception as e:
-            print(f"Error calculating credibility score for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error calculating credibility score for item %s", item.id)
+            if not commit:
+                # Let the batch caller decide what to do with its transaction
+                raise
             db.session.rollback()
             return None
     
     @staticmethod
-    def calculate_review_score(item):
+    def _fetch_review_aggregates(item_ids):
+        """
+        Compute the review aggregates for a batch of items in one GROUP BY query
+        Returns: dict mapping item id to its aggregate tuple (see _REVIEW_AGGREGATES)
+        """
+        rows = db.session.query(Review.reviewee_id, *_REVIEW_AGGREGATES).filter(
+            Review.reviewee_id.in_(item_ids)
+        ).group_by(Review.reviewee_id)
+        return {row[0]: tuple(row[1:]) for row in rows}
+    
+    @staticmethod
+    def _fetch_creator_inputs(item_ids):
+        """
+        Fetch each item's verified flag and its creator's columns for a batch of
+        items in one joined query; items without a creator are left out
+        Returns: dict mapping item id to a row with item_verified and _CREATOR_COLUMNS attributes
+        """
+        rows = db.session.query(
+            Item.id.label('item_id'), Item.is_verified.label('item_verified'), *_CREATOR_COLUMNS
+        ).join(
+            Profile, Profile.id == Item.profile_id
+        ).join(
+            User, User.id == Profile.user_id
+        ).filter(Item.id.in_(item_ids))
+        return {row.item_id: row for row in rows}
+    
+    @staticmethod
+    def _fetch_visibility_inputs(item_ids):
+        """
+        Fetch the visibility scoring columns for a batch of items in one query
+        Returns: dict mapping item id to its column tuple (see _VISIBILITY_COLUMNS)
+        """
+        rows = db.session.query(Item.id, *_VISIBILITY_COLUMNS).filter(Item.id.in_(item_ids))
+        return {row[0]: tuple(row[1:]) for row in rows}
+    
+    @staticmethod
+    def _review_values(aggregates, now=None):
+        """
+        Calculate the ItemReviewScore column values from an item's review aggregates
+        now: optional calculation timestamp, shared across a batch
+        Returns: dict of column values
+        """
+        now = now or datetime.utcnow()
+        
+        if not aggregates or not aggregates[0]:
+            # No reviews, set default scores
+            return {
+                'total_reviews': 0,
+                'average_rating': 0.0,
+                'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
+                'total_review_score': 0,
+                'review_level': 'none',
+                'review_percentage': 0.0,
+                'last_calculated': now
+            }
+        
+        # Review metrics (SQL aggregates may come back as Decimal)
+        total_reviews, average_rating, *rating_counts, detailed_reviews = aggregates
+        total_reviews = int(total_reviews)
+        average_rating = float(average_rating) if average_rating is not None else 0.0
+        rating_counts = [int(count or 0) for count in rating_counts]  # index 0 is rating 1
+        detailed_reviews = int(detailed_reviews or 0)
+        
+        # Review Quality Score (0-100 points)
+        quality_score = 0
+        
+        # Score based on number of reviews
+        if total_reviews >= 20:
+            quality_score += 40
+        elif total_reviews >= 10:
+            quality_score += 30
+        elif total_reviews >= 5:
+            quality_score += 20
+        elif total_reviews >= 1:
+            quality_score += 10
+        
+        # Score based on average rating
+        if average_rating >= 4.5:
+            quality_score += 30
+        elif average_rating >= 4.0:
+            quality_score += 25
+        elif average_rating >= 3.5:
+            quality_score += 20
+        elif average_rating >= 3.0:
+            quality_score += 15
+        elif average_rating >= 2.0:
+            quality_score += 10
+        elif average_rating > 0:
+            quality_score += 5
+        
+        # Score based on review content quality
+        if detailed_reviews > 0:
+            quality_score += min(30, (detailed_reviews / total_reviews) * 30)
+        
+        # Response Rate (placeholder for future implementation)
+        response_rate = 0.0  # This would be calculated based on user responses to reviews
+        dispute_rate = 0.0   # This would be calculated based on disputed reviews
+        
+        # Update scores
+        values = {
+            'total_reviews': total_reviews,
+            'average_rating': average_rating,
+            'rating_distribution': dict(enumerate(rating_counts, start=1)),
+            'review_quality_score': min(100, quality_score),
+            'response_rate': response_rate,
+            'dispute_rate': dispute_rate
+        }
+        
+        # Calculate total review score (0-300)
+        total_score = (values['review_quality_score'] +
+                      (response_rate * 100) +
+                      ((1 - dispute_rate) * 100))
+        
+        values['total_review_score'] = min(300, total_score)
+        values['review_percentage'] = (values['total_review_score'] / 300) * 100
+        
+        # Determine review level
+        values['review_level'] = _level_for(_REVIEW_LEVELS, values['review_percentage'])
+        
+        values['last_calculated'] = now
+        values['calculation_version'] = '1.0'
+        
+        return values
+    
+    @staticmethod
+    def calculate_review_score(item, commit=True, aggregates=None, now=None):
         """
         Calculate review score based on ratings and reviews
+        aggregates: optional precomputed review aggregate tuple for the item
         Returns: ItemReviewScore object
         """
         try:
@@ -328,132 +571,171 @@ class ScoringSystem:
                 review_score = ItemReviewScore(item_id=item.id)
                 db.session.add(review_score)
             
-            # Get all reviews for this item
-            reviews = Review.query.filter_by(reviewee_id=item.id).all()
-            
-            if not reviews:
-                # No reviews, set default scores
-                review_score.total_reviews = 0
-                review_score.average_rating = 0.0
-                review_score.rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-                review_score.total_review_score = 0
-                review_score.review_level = 'none'
-                review_score.review_percentage = 0.0
-                review_score.last_calculated = datetime.utcnow()
-                db.session.commit()
-                return review_score
-            
-            # Calculate review metrics
-            total_reviews = len(reviews)
-            ratings = [review.rating for review in reviews if review.rating]
-            
-            if ratings:
-                average_rating = sum(ratings) / len(ratings)
-                
-                # Calculate rating distribution
-                rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-                for rating in ratings:
-                    if 1 <= rating <= 5:
-                        rating_distribution[rating] += 1
-            else:
-                average_rating = 0.0
-                rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            
-            # Review Quality Score (0-100 points)
-            quality_score = 0
-            
-            # Score based on number of reviews
-            if total_reviews >= 20:
-                quality_score += 40
-            elif total_reviews >= 10:
-                quality_score += 30
-            elif total_reviews >= 5:
-                quality_score += 20
-            elif total_reviews >= 1:
-                quality_score += 10
-            
-            # Score based on average rating
-            if average_rating >= 4.5:
-                quality_score += 30
-            elif average_rating >= 4.0:
-                quality_score += 25
-            elif average_rating >= 3.5:
-                quality_score += 20
-            elif average_rating >= 3.0:
-                quality_score += 15
-            elif average_rating >= 2.0:
-                quality_score += 10
-            elif average_rating > 0:
-                quality_score += 5
-            
-            # Score based on review content quality
-            detailed_reviews = sum(1 for review in reviews if review.comment and len(review.comment) > 50)
-            if detailed_reviews > 0:
-                quality_score += min(30, (detailed_reviews / total_reviews) * 30)
-            
-            # Response Rate (placeholder for future implementation)
-            response_rate = 0.0  # This would be calculated based on user responses to reviews
-            dispute_rate = 0.0   # This would be calculated based on disputed reviews
-            
-            # Update scores
-            review_score.total_reviews = total_reviews
-            review_score.average_rating = average_rating
-            review_score.rating_distribution = rating_distribution
-            review_score.review_quality_score = min(100, quality_score)
-            review_score.response_rate = response_rate
-            review_score.dispute_rate = dispute_rate
-            
-            # Calculate total review score (0-300)
-            total_score = (review_score.review_quality_score + 
-                          (response_rate * 100) + 
-                          ((1 - dispute_rate) * 100))
-            
-            review_score.total_review_score = min(300, total_score)
-            review_score.review_percentage = (review_score.total_review_score / 300) * 100
-            
-            # Determine review level
-            if review_score.review_percentage >= 80:
-                review_score.review_level = 'excellent'
-            elif review_score.review_percentage >= 60:
-                review_score.review_level = 'high'
-            elif review_score.review_percentage >= 40:
-                review_score.review_level = 'medium'
-            elif review_score.review_percentage >= 20:
-                review_score.review_level = 'low'
-            else:
-                review_score.review_level = 'none'
+            if aggregates is None:
+                # Aggregate this item's reviews in SQL
+                aggregates = tuple(db.session.query(*_REVIEW_AGGREGATES).filter(
+                    Review.reviewee_id == item.id
+                ).one())
             
-            review_score.last_calculated = datetime.utcnow()
-            review_score.calculation_version = '1.0'
+            ScoringSystem._apply_values(review_score, ScoringSystem._review_values(aggregates, now=now))
             
-            db.session.commit()
+            if commit:
+                db.session.commit()
             return review_score
             
-        except Exception as e:
-            print(f"Error calculating review score for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error calculating review score for item %s", item.id)
+            if not commit:
+                # Let the batch caller decide what to do with its transaction
+                raise
             db.session.rollback()
             return None
     
     @staticmethod
-    def calculate_all_scores(item):
+    def calculate_all_scores(item, commit=True, now=None):
         """
-        Calculate all scores for an item
+        Calculate all scores for an item, stamped with a single calculation time
+        With commit=False the changes are left in the session for the caller to commit
         Returns: dict with all score objects
         """
         try:
-            visibility_score = ScoringSystem.calculate_visibility_score(item)
-            credibility_score = ScoringSystem.calculate_credibility_score(item)
-            review_score = ScoringSystem.calculate_review_score(item)
+            now = now or datetime.utcnow()
+            visibility_score = ScoringSystem.calculate_visibility_score(item, commit=commit, now=now)
+            credibility_score = ScoringSystem.calculate_credibility_score(item, commit=commit, now=now)
+            review_score = ScoringSystem.calculate_review_score(item, commit=commit, now=now)
             
             return {
                 'visibility': visibility_score,
                 'credibility': credibility_score,
                 'review': review_score
             }
-        except Exception as e:
-            print(f"Error calculating all scores for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error calculating all scores for item %s", item.id)
             return None
     
+    @staticmethod
+    def _score_row_unchanged(existing, row):
+        """
+        Check whether a stored score row already holds a calculated row's values
+        (last_calculated aside, so an unchanged score keeps its timestamp)
+        """
+        for column, value in row.items():
+            if column in ('item_id', 'last_calculated'):
+                continue
+            
+            stored = existing[column]
+            if isinstance(value, float) or isinstance(stored, float):
+                # Float columns may be stored in single precision
+                if stored is None or value is None or not math.isclose(value, stored, rel_tol=1e-6):
+                    return False
+            elif isinstance(value, (dict, list)):
+                # JSON columns come back with string keys
+                if json.dumps(value, sort_keys=True) != json.dumps(stored, sort_keys=True):
+                    return False
+            elif value != stored:
+                return False
+        return True
+    
+    @staticmethod
+    def _bulk_persist_scores(visibility_rows, credibility_rows, review_rows):
+        """
+        Write score rows (dicts of column values including item_id) with bulk
+        INSERT/UPDATE statements, bypassing the ORM unit of work; rows whose
+        stored values are unchanged are not written again
+        """
+        for model, rows in ((ItemVisibilityScore, visibility_rows),
+                            (ItemCredibilityScore, credibility_rows),
+                            (ItemReviewScore, review_rows)):
+            if not rows:
+                continue
+            
+            # Existing score rows for these items, with the columns being written,
+            # fetched in one query
+            columns = {column for row in rows for column in row} - {'item_id', 'last_calculated'}
+            existing_rows = {
+                existing.item_id: existing._mapping
+                for existing in db.session.query(
+                    model.item_id, model.id, *(model.__table__.c[column] for column in sorted(columns))
+                ).filter(model.item_id.in_([row['item_id'] for row in rows]))
+            }
+            
+            inserts = []
+            updates = []
+            for row in rows:
+                existing = existing_rows.get(row['item_id'])
+                if existing is None:
+                    inserts.append(row)
+                elif not ScoringSystem._score_row_unchanged(existing, row):
+                    updates.append(dict(row, id=existing['id']))
+            
+            if inserts:
+                db.session.bulk_insert_mappings(model, inserts)
+            if updates:
+                db.session.bulk_update_mappings(model, updates)
+    
+    @staticmethod
+    def calculate_all_scores_bulk(item_ids, now=None):
+        """
+        Calculate all scores for a batch of items and write them with bulk
+        statements, fetching visibility inputs, creator columns and review
+        aggregates for the whole batch in SQL, without loading Item objects
+        now: optional calculation timestamp; defaults to one taken for the batch
+        Returns: dict mapping item id to the calculated values (None on failure)
+        """
+        now = now or datetime.utcnow()
+        visibility_inputs = ScoringSystem._fetch_visibility_inputs(item_ids)
+        creator_inputs = ScoringSystem._fetch_creator_inputs(item_ids)
+        review_aggregates = ScoringSystem._fetch_review_aggregates(item_ids)
+        
+        results = {}
+        rows = {'visibility': [], 'credibility': [], 'review': []}
+        failures = 0
+        # Items deleted since their ids were listed have no visibility inputs
+        for item_id, inputs in visibility_inputs.items():
+            try:
+                creator = creator_inputs.get(item_id)
+                
+                values = {
+                    # Item has no media columns, so the media flags keep their defaults
+                    'visibility': ScoringSystem._visibility_values_from_columns(*inputs, now=now),
+                    'credibility': ScoringSystem._credibility_values(
+                        creator.item_verified if creator else False, creator, now=now
+                    ),
+                    'review': ScoringSystem._review_values(review_aggregates.get(item_id), now=now)
+                }
+            except Exception:
+                # One item's bad data shouldn't fail the rest of the batch
+                if failures < SCORING_FAILURE_LOG_LIMIT:
+                    logger.exception("Error calculating all scores for item %s", item_id)
+                failures += 1
+                results[item_id] = None
+                continue
+            
+            for kind, kind_values in values.items():
+                rows[kind].append(dict(kind_values, item_id=item_id))
+            results[item_id] = values
+        
+        try:
+            ScoringSystem._bulk_persist_scores(rows['visibility'], rows['credibility'], rows['review'])
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+        
+        return results
+    
+    @staticmethod
+    def _rescore_batch(batch_ids, now=None):
+        """
+        Rescore one batch of items in the current session
+        Returns: (results, error) - results from calculate_all_scores_bulk, or None and the error message
+        """
+        try:
+            return ScoringSystem.calculate_all_scores_bulk(batch_ids, now=now), None
+        except SQLAlchemyError as e:
+            logger.exception("Error rescoring items %s-%s", batch_ids[0], batch_ids[-1])
+            return None, str(e)
+    
     @staticmethod
     def update_all_item_scores():
         """
@@ -461,26 +743,57 @@ class ScoringSystem:
         Returns: dict with statistics
         """
         try:
-            items = Item.query.all()
+            item_ids = [item_id for (item_id,) in db.session.query(Item.id).order_by(Item.id)]
             stats = {
-                'total_items': len(items),
+                'total_items': len(item_ids),
                 'successful_updates': 0,
                 'failed_updates': 0,
                 'errors': []
             }
             
-            for item in items:
-                try:
-                    ScoringSystem.calculate_all_scores(item)
-                    stats['successful_updates'] += 1
-                except Exception as e:
-                    stats['failed_updates'] += 1
-                    stats['errors'].append(f"Item {item.id}: {str(e)}")
+            batches = [item_ids[start:start + SCORING_BATCH_SIZE]
+                       for start in range(0, len(item_ids), SCORING_BATCH_SIZE)]
+            workers = min(SCORING_WORKERS, len(batches))
+            
+            # One calculation timestamp for the whole run
+            now = datetime.utcnow()
+            
+            # Each batch gets a fresh session, so only one batch of rows is held
+            # in memory per worker, whatever the size of the table
+            app = current_app._get_current_object()
             
+            def rescore_in_app_context(batch_ids):
+                with app.app_context():
+                    return ScoringSystem._rescore_batch(batch_ids, now=now)
+            
+            # Batches commit independently, so they can overlap their database round
+            # trips; SQLite serialises writers, so it rescores them one at a time
+            if workers > 1 and db.engine.dialect.name != 'sqlite':
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    outcomes = list(executor.map(rescore_in_app_context, batches))
+            else:
+                outcomes = [rescore_in_app_context(batch_ids) for batch_ids in batches]
+            
+            for batch_ids, (results, error) in zip(batches, outcomes):
+                if error is not None:
+                    stats['failed_updates'] += len(batch_ids)
+                    stats['errors'].append(f"Items {batch_ids[0]}-{batch_ids[-1]}: {error}")
+                    continue
+                
+                for item_id, scores in results.items():
+                    if scores is not None:
+                        stats['successful_updates'] += 1
+                    else:
+                        stats['failed_updates'] += 1
+                        stats['errors'].append(f"Item {item_id}: score calculation failed")
+            
+            if stats['failed_updates']:
+                logger.warning("Rescored %s of %s items, %s failed",
+                               stats['successful_updates'], stats['total_items'], stats['failed_updates'])
             return stats
             
-        except Exception as e:
-            print(f"Error updating all item scores: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error updating all item scores")
             return None
     
     @staticmethod
@@ -490,22 +803,33 @@ class ScoringSystem:
         Returns: float (0.0-100.0)
         """
         try:
-            visibility_score = ItemVisibilityScore.query.filter_by(item_id=item.id).first()
-            credibility_score = ItemCredibilityScore.query.filter_by(item_id=item.id).first()
-            review_score = ItemReviewScore.query.filter_by(item_id=item.id).first()
-            
-            if not all([visibility_score, credibility_score, review_score]):
+            # The three percentages in one round trip; no row unless all three scores exist
+            percentages = db.session.query(
+                ItemVisibilityScore.visibility_percentage,
+                ItemCredibilityScore.credibility_percentage,
+                ItemReviewScore.review_percentage
+            ).join(
+                ItemCredibilityScore, ItemCredibilityScore.item_id == ItemVisibilityScore.item_id
+            ).join(
+                ItemReviewScore, ItemReviewScore.item_id == ItemVisibilityScore.item_id
+            ).filter(
+                ItemVisibilityScore.item_id == item.id
+            ).first()
+            
+            if percentages is None:
                 return 0.0
             
+            visibility_percentage, credibility_percentage, review_percentage = percentages
+            
             # Weighted scoring (visibility: 40%, credibility: 35%, review: 25%)
             total_score = (
-                visibility_score.visibility_percentage * 0.40 +
-                credibility_score.credibility_percentage * 0.35 +
-                review_score.review_percentage * 0.25
+                visibility_percentage * 0.40 +
+                credibility_percentage * 0.35 +
+                review_percentage * 0.25
             )
             
             return min(100.0, total_score)
             
-        except Exception as e:
-            print(f"Error getting total score for item {item.id}: {e}")
+        except SQLAlchemyError:
+            logger.exception("Error getting total score for item %s", item.id)
             return 0.0
@@ -3,75 +3,300 @@ Advanced Security System
 Rate limiting, input validation, security headers, and threat detection
 """
 
+import atexit
 import time
 import hashlib
+import hmac
+import queue
 import re
+import string
+import threading
 from functools import wraps
 from flask import request, jsonify, current_app, g
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict
 import ipaddress
 
+# Suspicious request indicators scored by is_suspicious_request, as (literal,
+# pattern, points): SQL injection patterns are worth 10 points and XSS patterns 5.
+# Every match of a pattern contains its lowercase literal, and a pattern of None
+# means the literal itself is the whole (case-insensitive) pattern
+_SUSPICIOUS_PATTERNS = [
+    # SQL injection
+    ('union', r'union\s+select', 10),
+    ('drop', r'drop\s+table', 10),
+    ('delete', r'delete\s+from', 10),
+    ('insert', r'insert\s+into', 10),
+    ('update', r'update\s+set', 10),
+    ('exec', r'exec\s*\(', 10),
+    ('script', r'script\s*>', 10),
+    ('<script', None, 10),
+    ('javascript:', None, 10),
+    ('../', None, 10),
+    ('..\\', None, 10),
+    ('%00', None, 10),
+    ('\x00', None, 10),
+    # XSS
+    ('<script', None, 5),
+    ('javascript:', None, 5),
+    ('onload=', None, 5),
+    ('onerror=', None, 5),
+    ('onclick=', None, 5),
+    ('onmouseover=', None, 5),
+    ('<iframe', None, 5),
+    ('<object', None, 5)
+]
+
+# (literal, compiled pattern, literal-only flag, points), compiled once
+_SUSPICIOUS_CHECKS = [
+    (literal, re.compile(pattern or re.escape(literal), re.IGNORECASE), pattern is None, points)
+    for literal, pattern, points in _SUSPICIOUS_PATTERNS
+]
+
+# Request bodies are only scanned up to _SCAN_BODY_LIMIT bytes, and bodies over
+# _MAX_REQUEST_SIZE (suspicious in themselves) are not read for scanning at all
+_SCAN_BODY_LIMIT = 64 * 1024
+_MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Bodies left to the form parser; request.data is empty for these, so they aren't scanned
+_FORM_MIMETYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+class _ReplayedInput:
+    """WSGI input that returns an already-read head before the rest of the original stream"""
+    
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+    
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.stream.read(), b''
+        else:
+            data, self.head = self.head[:size], self.head[size:]
+        return data
+    
+    def readline(self, size=-1):
+        if not self.head:
+            return self.stream.readline(size)
+        limit = len(self.head) if size is None or size < 0 else min(size, len(self.head))
+        end = self.head.find(b'\n', 0, limit) + 1 or limit
+        data, self.head = self.head[:end], self.head[end:]
+        if not data.endswith(b'\n') and not self.head and (size is None or size < 0 or len(data) < size):
+            # The line carries on past the head
+            data += self.stream.readline(-1 if size is None or size < 0 else size - len(data))
+        return data
+
+def _body_head(request):
+    """
+    First _SCAN_BODY_LIMIT bytes of a non-form request body. Larger bodies are
+    read only up to the limit and the head is put back, so the view still sees
+    the whole body and nothing beyond the head is buffered for the scan
+    """
+    if request.mimetype in _FORM_MIMETYPES:
+        return b''
+    
+    # Small bodies, or a body someone has already started reading through
+    # request.stream (a cached property), are read the usual way
+    content_length = request.content_length
+    if (content_length is not None and content_length <= _SCAN_BODY_LIMIT) or 'stream' in request.__dict__:
+        return request.get_data(cache=True)[:_SCAN_BODY_LIMIT]
+    
+    # Werkzeug ignores a body with no length unless the server terminates the stream
+    if content_length is None and 'wsgi.input_terminated' not in request.environ:
+        return b''
+    
+    wsgi_input = request.environ['wsgi.input']
+    head = wsgi_input.read(_SCAN_BODY_LIMIT)
+    request.environ['wsgi.input'] = _ReplayedInput(head, wsgi_input)
+    return head
+
+# Characters rejected by validate_input: < > " ' & ; ( ) | `
+_DANGEROUS_CHARS_RE = re.compile(r'[<>"\'&;()|`]')
+
+# Input format patterns for validate_input
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_RE = re.compile(r'^\+?[\d\s\-\(\)]{10,}$')
+_URL_RE = re.compile(r'^https?://[^\s/$.?#].[^\s]*$')
+
+# Format check and error message for each validate_input type ("text" has none)
+_INPUT_FORMATS = {
+    'email': (_EMAIL_RE.match, "Invalid email format"),
+    'phone': (_PHONE_RE.match, "Invalid phone format"),
+    'url': (_URL_RE.match, "Invalid URL format"),
+    'alphanumeric': (lambda data: data.replace(' ', '').isalnum(), "Only alphanumeric characters allowed"),
+    'numeric': (lambda data: data.isdigit(), "Only numeric characters allowed")
+}
+
+# HTML tags stripped by sanitize_input, and the escapes applied to what remains
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_HTML_ESCAPES = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;'
+})
+
+# Character classes required by check_password_strength
+_UPPER_CHARS = frozenset(string.ascii_uppercase)
+_LOWER_CHARS = frozenset(string.ascii_lowercase)
+_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+# Security events are queued by log_security_event and written in batches by a
+# background thread, so logging never waits on the database
+_SECURITY_EVENT_QUEUE = queue.Queue(maxsize=10000)
+_SECURITY_EVENT_BATCH_SIZE = 256
+_SECURITY_EVENT_BATCH_WAIT = 0.1  # seconds to wait for a batch to fill
+_SECURITY_EVENT_STOP = object()  # queued at exit to stop the writer
+_SECURITY_EVENT_FLUSH_TIMEOUT = 5  # seconds the exit flush waits for the writer
+_security_event_worker = None
+_security_event_worker_lock = threading.Lock()
+_security_event_flush_registered = False
+
+class ExpiringCounter:
+    """
+    Exact per-key counts that expire window seconds after a key's first hit;
+    capped at max_keys, evicting the least recently counted key first
+    """
+    
+    def __init__(self, max_keys=10000, window=3600):
+        self.max_keys = max_keys
+        self.window = window
+        self.counts = OrderedDict()  # key -> [count, first hit time]
+        self.lock = threading.Lock()
+    
+    def add(self, key, count=1):
+        """Add count for key and return its total within the current window"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.counts.get(key)
+            if entry is None or now - entry[1] >= self.window:
+                entry = self.counts[key] = [0, now]
+            entry[0] += count
+            self.counts.move_to_end(key)
+            if len(self.counts) > self.max_keys:
+                self.counts.popitem(last=False)
+            return entry[0]
+    
+    def get(self, key):
+        """Total for key within the current window"""
+        with self.lock:
+            entry = self.counts.get(key)
+            if entry is None or time.monotonic() - entry[1] >= self.window:
+                return 0
+            return entry[0]
+
 class SecurityManager:
     """Centralized security management"""
     
     def __init__(self):
-        self.rate_limits = defaultdict(lambda: deque())
+        self.rate_limits = {}  # identifier -> [window bucket, current count, previous count]
+        self.token_buckets = {}  # identifier -> (tokens, last refill time)
+        self.token_buckets_lock = threading.Lock()
         self.blocked_ips = set()
-        self.suspicious_ips = defaultdict(int)
+        self.blocked_networks = {}  # (IP version, prefix length) -> set of network address ints
+        self.suspicious_ips = ExpiringCounter()  # bounded memory however many IPs are seen
         self.failed_attempts = defaultdict(int)
     
     def is_rate_limited(self, identifier, limit=100, window=3600):
-        """Check if identifier is rate limited"""
+        """Check if identifier is rate limited (sliding window estimated from two fixed buckets)"""
         now = time.time()
         identifier = str(identifier)
+        bucket = int(now // window)
         
-        # Clean old entries
-        while self.rate_limits[identifier] and self.rate_limits[identifier][0] <= now - window:
-            self.rate_limits[identifier].popleft()
+        # Roll the counters forward to the current bucket
+        counts = self.rate_limits.get(identifier)
+        if counts is None or counts[0] not in (bucket, bucket - 1):
+            counts = self.rate_limits[identifier] = [bucket, 0, 0]
+        elif counts[0] == bucket - 1:
+            counts[:] = [bucket, 0, counts[1]]
         
-        # Check if limit exceeded
-        if len(self.rate_limits[identifier]) >= limit:
+        # Check if limit exceeded, weighting the previous bucket by how much of
+        # it still falls inside the window
+        elapsed_fraction = (now % window) / window
+        if counts[2] * (1 - elapsed_fraction) + counts[1] >= limit:
             return True
         
-        # Add current request
-        self.rate_limits[identifier].append(now)
+        # Count current request
+        counts[1] += 1
         return False
     
+    def try_acquire(self, identifier, rate, burst):
+        """
+        Take a token from identifier's bucket, refilled at rate tokens per second
+        up to burst; returns False when the bucket is empty. A new bucket starts
+        full, so over any period t at most burst + rate * t tokens are taken
+        """
+        identifier = str(identifier)
+        
+        # Read, refill and take under the lock so threaded requests can't spend the same token
+        with self.token_buckets_lock:
+            now = time.monotonic()
+            tokens, last_refill = self.token_buckets.get(identifier, (burst, now))
+            tokens = min(burst, tokens + (now - last_refill) * rate)
+            
+            if tokens < 1:
+                self.token_buckets[identifier] = (tokens, now)
+                return False
+            
+            self.token_buckets[identifier] = (tokens - 1, now)
+            return True
+    
     def is_ip_blocked(self, ip):
-        """Check if IP is blocked"""
-        return ip in self.blocked_ips
+        """Check if IP is blocked, individually or by a blocked network"""
+        if ip in self.blocked_ips:
+            return True
+        if not self.blocked_networks:
+            return False
+        
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        
+        # One set lookup per distinct blocked prefix length
+        address_int = int(address)
+        for (version, prefixlen), networks in self.blocked_networks.items():
+            if version == address.version:
+                host_bits = address.max_prefixlen - prefixlen
+                if (address_int >> host_bits) << host_bits in networks:
+                    return True
+        return False
     
     def block_ip(self, ip, reason="Suspicious activity"):
-        """Block an IP address"""
-        self.blocked_ips.add(ip)
+        """Block an IP address, or a whole network given in CIDR notation (e.g. 10.0.0.0/24)"""
+        if '/' in ip:
+            network = ipaddress.ip_network(ip, strict=False)
+            key = (network.version, network.prefixlen)
+            self.blocked_networks.setdefault(key, set()).add(int(network.network_address))
+        else:
+            self.blocked_ips.add(ip)
         current_app.logger.warning(f"IP {ip} blocked: {reason}")
     
     def is_suspicious_request(self, request):
         """Detect suspicious request patterns"""
         suspicious_score = 0
         
-        # Check for SQL injection patterns
-        sql_patterns = [
-            r'union\s+select', r'drop\s+table', r'delete\s+from',
-            r'insert\s+into', r'update\s+set', r'exec\s*\(',
-            r'script\s*>', r'<script', r'javascript:',
-            r'\.\./', r'\.\.\\', r'%00', r'\x00'
-        ]
-        
-        request_string = f"{request.url} {request.data.decode('utf-8', errors='ignore')}"
-        for pattern in sql_patterns:
-            if re.search(pattern, request_string, re.IGNORECASE):
-                suspicious_score += 10
+        oversized = bool(request.content_length and request.content_length > _MAX_REQUEST_SIZE)
         
-        # Check for XSS patterns
-        xss_patterns = [
-            r'<script', r'javascript:', r'onload=', r'onerror=',
-            r'onclick=', r'onmouseover=', r'<iframe', r'<object'
-        ]
+        # Only the start of the body is read, decoded and scanned
+        body = b'' if oversized else _body_head(request)
+        request_string = f"{request.url} {body.decode('utf-8', errors='ignore')}"
         
-        for pattern in xss_patterns:
-            if re.search(pattern, request_string, re.IGNORECASE):
-                suspicious_score += 5
+        # Check for SQL injection and XSS patterns. Literals are found with plain
+        # substring scans, and a regex only runs to confirm a pattern whose literal
+        # is present; case-insensitive regexes also match some non-ASCII letters
+        # (e.g. 'ı' for 'i'), so other requests are checked with every regex
+        if request_string.isascii():
+            lowered = request_string.lower()
+            for literal, regex, literal_only, points in _SUSPICIOUS_CHECKS:
+                if literal in lowered and (literal_only or regex.search(request_string)):
+                    suspicious_score += points
+        else:
+            for _, regex, _, points in _SUSPICIOUS_CHECKS:
+                if regex.search(request_string):
+                    suspicious_score += points
         
         # Check for path traversal
         if '..' in request.path or '//' in request.path:
@@ -83,7 +308,7 @@ class SecurityManager:
             suspicious_score += 5
         
         # Check for unusual request size
-        if request.content_length and request.content_length > 10 * 1024 * 1024:  # 10MB
+        if oversized:
             suspicious_score += 10
         
         return suspicious_score > 20
@@ -93,32 +318,14 @@ class SecurityManager:
         if not data:
             return True, data
         
-        if input_type == "email":
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, data):
-                return False, "Invalid email format"
-        
-        elif input_type == "phone":
-            phone_pattern = r'^\+?[\d\s\-\(\)]{10,}$'
-            if not re.match(phone_pattern, data):
-                return False, "Invalid phone format"
-        
-        elif input_type == "url":
-            url_pattern = r'^https?://[^\s/$.?#].[^\s]*$'
-            if not re.match(url_pattern, data):
-                return False, "Invalid URL format"
-        
-        elif input_type == "alphanumeric":
-            if not data.replace(' ', '').isalnum():
-                return False, "Only alphanumeric characters allowed"
-        
-        elif input_type == "numeric":
-            if not data.isdigit():
-                return False, "Only numeric characters allowed"
+        input_format = _INPUT_FORMATS.get(input_type)
+        if input_format:
+            check, error_msg = input_format
+            if not check(data):
+                return False, error_msg
         
         # Check for dangerous characters
-        dangerous_chars = ['<', '>', '"', "'", '&', ';', '(', ')', '|', '`']
-        if any(char in data for char in dangerous_chars):
+        if _DANGEROUS_CHARS_RE.search(data):
             return False, "Dangerous characters detected"
         
         return True, data
@@ -129,22 +336,23 @@ class SecurityManager:
             return data
         
         # Remove HTML tags
-        data = re.sub(r'<[^>]+>', '', data)
+        data = _HTML_TAG_RE.sub('', data)
         
         # Escape special characters
-        data = data.replace('&', '&amp;')
-        data = data.replace('<', '&lt;')
-        data = data.replace('>', '&gt;')
-        data = data.replace('"', '&quot;')
-        data = data.replace("'", '&#x27;')
-        
-        return data
+        return data.translate(_HTML_ESCAPES)
 
 # Global security manager
 security_manager = SecurityManager()
 
 def rate_limit(limit=100, window=3600, per='ip'):
-    """Rate limiting decorator"""
+    """
+    Rate limiting decorator; allows at most limit requests in any window,
+    of which up to a tenth may arrive as a burst
+    """
+    # The burst plus what refills over a window never exceeds limit
+    burst = max(1, limit // 10)
+    rate = max(limit - burst, 1) / window
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -155,7 +363,7 @@ def rate_limit(limit=100, window=3600, per='ip'):
             else:
                 identifier = request.remote_addr
             
-            if security_manager.is_rate_limited(identifier, limit, window):
+            if not security_manager.try_acquire(identifier, rate, burst):
                 return jsonify({
                     'error': 'Rate limit exceeded',
                     'message': f'Too many requests. Limit: {limit} per {window} seconds'
@@ -182,8 +390,17 @@ def security_headers(f):
         return response
     return decorated_function
 
-def validate_input(input_type="text", required=True):
-    """Input validation decorator"""
+def validate_input(input_type="text", required=True, schema=None):
+    """
+    Input validation decorator; schema optionally maps field names to their
+    own input types, other fields use input_type
+    """
+    if schema:
+        unknown_types = set(schema.values()) - set(_INPUT_FORMATS) - {"text"}
+        if unknown_types:
+            raise ValueError(f"Unknown input types in schema: {', '.join(sorted(unknown_types))}")
+    field_types = dict(schema or {})
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -198,15 +415,14 @@ def validate_input(input_type="text", required=True):
                         }), 400
                     
                     if value:
-                        is_valid, error_msg = security_manager.validate_input(value, input_type)
+                        # A value that passes can't contain anything sanitize_input would
+                        # strip or escape, so it is left as is
+                        is_valid, error_msg = security_manager.validate_input(value, field_types.get(field, input_type))
                         if not is_valid:
                             return jsonify({
                                 'error': 'Validation failed',
                                 'message': f'Field {field}: {error_msg}'
                             }), 400
-                        
-                        # Sanitize the input
-                        data[field] = security_manager.sanitize_input(value)
             
             return f(*args, **kwargs)
         return decorated_function
@@ -227,10 +443,10 @@ def threat_detection(f):
         
         # Check for suspicious request
         if security_manager.is_suspicious_request(request):
-            security_manager.suspicious_ips[client_ip] += 1
+            suspicious_count = security_manager.suspicious_ips.add(client_ip)
             
             # Block IP if too many suspicious requests
-            if security_manager.suspicious_ips[client_ip] > 5:
+            if suspicious_count > 5:
                 security_manager.block_ip(client_ip, "Multiple suspicious requests")
                 return jsonify({
                     'error': 'Access denied',
@@ -247,11 +463,12 @@ def csrf_protection(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if request.method in ['POST', 'PUT', 'DELETE', 'PATCH']:
-            # Check CSRF token
+            # Check CSRF token; the form is only parsed when the header is missing
             csrf_token = request.headers.get('X-CSRF-Token') or request.form.get('csrf_token')
             session_token = request.cookies.get('csrf_token')
             
-            if not csrf_token or not session_token or csrf_token != session_token:
+            if (not csrf_token or not session_token or
+                    not hmac.compare_digest(csrf_token.encode('utf-8'), session_token.encode('utf-8'))):
                 return jsonify({
                     'error': 'CSRF validation failed',
                     'message': 'Invalid or missing CSRF token'
@@ -265,37 +482,138 @@ def generate_csrf_token():
     import secrets
     return secrets.token_hex(32)
 
-def log_security_event(event_type, details, user_id=None, ip=None):
-    """Log security events"""
+def _write_security_events(app, events):
+    """Write a batch of security events in one transaction"""
     from utils.analytics import AnalyticsService
     
-    AnalyticsService.track_event(
-        event_type='security_event',
-        event_name=event_type,
-        properties={
+    if not events:
+        return
+    try:
+        with app.app_context():
+            AnalyticsService.track_events_bulk(events)
+    except Exception as e:
+        app.logger.error(f"Failed to write security events: {str(e)}")
+
+def _drain_security_events(app):
+    """Write queued security events in batches (runs in a daemon thread)"""
+    while True:
+        batch = [_SECURITY_EVENT_QUEUE.get()]
+        deadline = time.monotonic() + _SECURITY_EVENT_BATCH_WAIT
+        while len(batch) < _SECURITY_EVENT_BATCH_SIZE and batch[-1] is not _SECURITY_EVENT_STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_SECURITY_EVENT_QUEUE.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        if batch[-1] is _SECURITY_EVENT_STOP:
+            _write_security_events(app, batch[:-1])
+            return
+        _write_security_events(app, batch)
+
+def _flush_security_events(app):
+    """Write every queued security event before the process exits (registered with atexit)"""
+    # Let the writer finish the batch it holds, then write whatever is left here
+    worker = _security_event_worker
+    if worker is not None and worker.is_alive():
+        try:
+            _SECURITY_EVENT_QUEUE.put(_SECURITY_EVENT_STOP, timeout=_SECURITY_EVENT_FLUSH_TIMEOUT)
+        except queue.Full:
+            pass
+        worker.join(_SECURITY_EVENT_FLUSH_TIMEOUT)
+    
+    events = []
+    while True:
+        try:
+            event = _SECURITY_EVENT_QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if event is not _SECURITY_EVENT_STOP:
+            events.append(event)
+    
+    for start in range(0, len(events), _SECURITY_EVENT_BATCH_SIZE):
+        _write_security_events(app, events[start:start + _SECURITY_EVENT_BATCH_SIZE])
+
+def _ensure_security_event_worker():
+    """Start the security event writer for this app if it isn't running"""
+    global _security_event_worker, _security_event_flush_registered
+    
+    with _security_event_worker_lock:
+        if _security_event_worker is None or not _security_event_worker.is_alive():
+            app = current_app._get_current_object()
+            _security_event_worker = threading.Thread(
+                target=_drain_security_events,
+                args=(app,),
+                daemon=True
+            )
+            _security_event_worker.start()
+            
+            # The writer is a daemon thread, so queued events are flushed at exit
+            if not _security_event_flush_registered:
+                atexit.register(_flush_security_events, app)
+                _security_event_flush_registered = True
+
+def log_security_event(event_type, details, user_id=None, ip=None):
+    """Log security events (queued and written in the background)"""
+    # Request details are captured now, as the writer runs outside the request
+    user = getattr(g, 'user', None)
+    event = {
+        'event_type': 'security_event',
+        'event_name': event_type,
+        'properties': {
             'details': details,
             'user_id': user_id,
             'ip': ip or request.remote_addr,
             'timestamp': time.time()
         },
-        user_id=user_id
-    )
+        'user_id': user_id or (user.id if user is not None and user.is_authenticated else None),
+        'page_url': request.url,
+        'referrer': request.referrer,
+        'user_agent': request.user_agent.string,
+        'ip_address': request.remote_addr
+    }
+    
+    if _security_event_worker is None or not _security_event_worker.is_alive():
+        _ensure_security_event_worker()
+    
+    try:
+        _SECURITY_EVENT_QUEUE.put_nowait(event)
+    except queue.Full:
+        current_app.logger.warning(f"Security event queue full, dropped {event_type} event")
 
 def check_password_strength(password):
     """Check password strength"""
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not re.search(r'[A-Z]', password):
+    # Single pass over the password, stopping once every class has been seen
+    has_upper = has_lower = has_digit = has_special = False
+    for char in password:
+        if char in _UPPER_CHARS:
+            has_upper = True
+        elif char in _LOWER_CHARS:
+            has_lower = True
+        elif char.isdecimal():
+            has_digit = True
+        elif char in _SPECIAL_CHARS:
+            has_special = True
+        else:
+            continue
+        if has_upper and has_lower and has_digit and has_special:
+            break
+    
+    if not has_upper:
         return False, "Password must contain at least one uppercase letter"
     
-    if not re.search(r'[a-z]', password):
+    if not has_lower:
         return False, "Password must contain at least one lowercase letter"
     
-    if not re.search(r'\d', password):
+    if not has_digit:
         return False, "Password must contain at least one number"
     
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+    if not has_special:
         return False, "Password must contain at least one special character"
     
     return True, "Password is strong"
@@ -316,6 +634,6 @@ def verify_password(password, hashed):
         import bcrypt
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
     except ImportError:
-        # Fallback to simple hash if bcrypt not available
-        import hashlib
-        return hashlib.sha256(password.encode('utf-8')).hexdigest() == hashed
+        # Fallback to simple hash if bcrypt not available, compared in constant time
+        expected = hashlib.sha256(password.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(expected.encode('utf-8'), hashed.encode('utf-8'))
@@ -3,8 +3,13 @@ Utility functions for generating URL-friendly slugs
 """
 import re
 import unicodedata
+from sqlalchemy import or_
 from models import Profile, Organization
 
+# Characters dropped from slugs, and the runs of hyphens/whitespace collapsed to one hyphen
+_NON_SLUG_CHARS_RE = re.compile(r'[^\w\s-]')
+_SEPARATORS_RE = re.compile(r'[-\s]+')
+
 def generate_slug(text, model_class=None, exclude_id=None):
     """
     Generate a URL-friendly slug from text
@@ -24,8 +29,8 @@ def generate_slug(text, model_class=None, exclude_id=None):
     text = unicodedata.normalize('NFKD', text.lower())
     
     # Remove special characters and replace spaces with hyphens
-    slug = re.sub(r'[^\w\s-]', '', text)
-    slug = re.sub(r'[-\s]+', '-', slug)
+    slug = _NON_SLUG_CHARS_RE.sub('', text)
+    slug = _SEPARATORS_RE.sub('-', slug)
     
     # Remove leading/trailing hyphens
     slug = slug.strip('-')
@@ -39,19 +44,16 @@ def generate_slug(text, model_class=None, exclude_id=None):
         original_slug = slug
         counter = 1
         
-        while True:
-            # Check if slug already exists
-            if exclude_id:
-                existing = model_class.query.filter(
-                    model_class.slug == slug,
-                    model_class.id != exclude_id
-                ).first()
-            else:
-                existing = model_class.query.filter_by(slug=slug).first()
-            
-            if not existing:
-                break
-            
+        # Fetch every existing slug the counter could collide with in one query
+        # (lowercased, as the database compares slugs case-insensitively)
+        query = model_class.query.with_entities(model_class.slug).filter(
+            or_(model_class.slug == original_slug, model_class.slug.like(f"{original_slug}-%"))
+        )
+        if exclude_id:
+            query = query.filter(model_class.id != exclude_id)
+        taken = {existing_slug.lower() for (existing_slug,) in query if existing_slug}
+        
+        while slug in taken:
             # Add counter to make it unique
             slug = f"{original_slug}-{counter}"
             counter += 1
@@ -4,6 +4,18 @@ Template Filters for File Path Handling
 Handles both old and new file structure paths
 """
 
+import re
+from functools import lru_cache
+
+# Markup wrapped around each search term match by the highlight filter
+_HIGHLIGHT_MARK = '<mark style="background-color: #ffeb3b; padding: 2px 4px; border-radius: 3px;">{}</mark>'.format
+
+@lru_cache(maxsize=512)
+def _highlight_pattern(search_term):
+    """Compiled case-insensitive pattern for a search term, shared across rendered rows"""
+    return re.compile(re.escape(search_term), re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
 def get_file_url(filename):
     """
     Generate proper URL for file, handling both old and new file structures
@@ -18,7 +30,8 @@ def get_file_url(filename):
         return ""
     
     # Normalize path separators (convert backslashes to forward slashes)
-    filename = filename.replace('\\', '/')
+    if '\\' in filename:
+        filename = filename.replace('\\', '/')
     
     # If it's already a full path starting with uploads/, use it as is
     if filename.startswith('uploads/'):
@@ -27,6 +40,7 @@ def get_file_url(filename):
     # If it's an old format filename, prepend uploads/
     return f"/static/uploads/{filename}"
 
+@lru_cache(maxsize=4096)
 def is_old_format(filename):
     """
     Check if filename is in old format (question_id_filename_timestamp_uuid.ext)
@@ -44,6 +58,7 @@ def is_old_format(filename):
     # New format: uploads/users/user_id/.../user_id_item_id_timestamp_uuid.ext
     return not filename.startswith('uploads/')
 
+@lru_cache(maxsize=4096)
 def get_file_display_name(filename):
     """
     Get display name for file (without path)
@@ -62,7 +77,6 @@ def get_file_display_name(filename):
 def register_template_filters(app):
     """Register all template filters with Flask app"""
     from markupsafe import Markup
-    import re
     
     @app.template_filter('file_url')
     def file_url_filter(filename):
@@ -96,9 +110,8 @@ def register_template_filters(app):
         
         # Case-insensitive replacement with highlighting
         try:
-            pattern = re.compile(re.escape(search_term), re.IGNORECASE)
-            highlighted = pattern.sub(
-                lambda m: f'<mark style="background-color: #ffeb3b; padding: 2px 4px; border-radius: 3px;">{m.group()}</mark>',
+            highlighted = _highlight_pattern(search_term).sub(
+                lambda m: _HIGHLIGHT_MARK(m.group()),
                 escaped_text
             )
             return Markup(highlighted)
@@ -3,6 +3,7 @@ Wallet service utilities for managing user wallets and transactions
 """
 
 from datetime import datetime
+from itertools import accumulate
 from flask import current_app
 from models import db, Wallet, WalletTransaction, WithdrawalRequest, User, Earning
 
@@ -201,17 +202,19 @@ class WalletService:
             user_id=user_id
         ).order_by(WithdrawalRequest.created_at.desc()).limit(5).all()
         
-        # Get total earnings
-        total_earnings = db.session.query(db.func.sum(Earning.amount)).filter_by(
-            user_id=user_id,
-            status='paid'
-        ).scalar() or 0
-        
-        # Get total withdrawals
-        total_withdrawals = db.session.query(db.func.sum(WithdrawalRequest.amount)).filter_by(
-            user_id=user_id,
-            status='approved'
-        ).scalar() or 0
+        # Get total earnings and total withdrawals in one round trip
+        total_earnings, total_withdrawals = db.session.query(
+            db.session.query(db.func.sum(Earning.amount)).filter(
+                Earning.user_id == user_id,
+                Earning.status == 'paid'
+            ).scalar_subquery(),
+            db.session.query(db.func.sum(WithdrawalRequest.amount)).filter(
+                WithdrawalRequest.user_id == user_id,
+                WithdrawalRequest.status == 'approved'
+            ).scalar_subquery()
+        ).one()
+        total_earnings = total_earnings or 0
+        total_withdrawals = total_withdrawals or 0
         
         return {
             'wallet': wallet,
@@ -229,11 +232,49 @@ class WalletService:
         paid_earnings = Earning.query.filter_by(
             user_id=user_id,
             status='paid'
-        ).all()
+        ).order_by(Earning.id).all()
+        
+        if not paid_earnings:
+            return 0
+        
+        wallet = WalletService.get_or_create_wallet(user_id)
         
-        synced_count = 0
-        for earning in paid_earnings:
-            if WalletService.add_earning_to_wallet(earning.id):
-                synced_count += 1
+        # Earnings that already have a wallet transaction, fetched in one query
+        processed_ids = {
+            reference_id for (reference_id,) in db.session.query(WalletTransaction.reference_id).filter(
+                WalletTransaction.reference_type == 'earning',
+                WalletTransaction.reference_id.in_([str(earning.id) for earning in paid_earnings])
+            )
+        }
+        
+        new_earnings = [earning for earning in paid_earnings if str(earning.id) not in processed_ids]
+        if not new_earnings:
+            return 0
+        
+        # Running balance after each deposit; balances[i] is the balance before new_earnings[i]
+        balances = list(accumulate((earning.amount for earning in new_earnings), initial=wallet.balance))
+        
+        now = datetime.utcnow()
+        new_transactions = [
+            WalletTransaction(
+                wallet_id=wallet.id,
+                user_id=earning.user_id,
+                transaction_type='deposit',
+                amount=earning.amount,
+                currency=earning.currency,
+                balance_before=balance_before,
+                balance_after=balance_after,
+                description=f'Deposit from {earning.earning_type}: {earning.description}',
+                reference_id=str(earning.id),
+                reference_type='earning',
+                status='completed',
+                completed_at=now
+            )
+            for earning, balance_before, balance_after in zip(new_earnings, balances, balances[1:])
+        ]
+        wallet.balance = balances[-1]
+        
+        db.session.bulk_save_objects(new_transactions)
+        db.session.commit()
         
-        return synced_count
+        return len(new_transactions)